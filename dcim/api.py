@@ -3,29 +3,69 @@ The OpenDCIM python convenience API
 
 This API allows for use of client functionality by using a default client
 object, similar to how the ``requests`` package will automatically
-create a session. This should not be used when function calls are repeated
-many times as it will not make use of TLS connection pooling and keep-alive.
+create a session. The default client is created on first use and shared
+by all subsequent calls so that TLS connections are pooled and kept
+alive between calls. It does not cache responses, so every call sees
+the current OpenDCIM records. It is replaced by a new client after the
+configuration is changed with ``dcim.configure``, and closed when the
+interpreter exits.
 """
+import atexit
+import threading
+
+import dcim.client
 from dcim.client import DCIMClient
 
 
+_default_client = None
+_default_config = None
+_client_lock = threading.Lock()
+
+
+def _get_client():
+    """
+    Return the shared default client, creating it on first use and
+    whenever the client configuration was changed since.
+    """
+    global _default_client, _default_config
+    client = _default_client
+    if client is not None and dcim.client.client_config is _default_config:
+        return client
+
+    with _client_lock:
+        if (_default_client is None or
+                dcim.client.client_config is not _default_config):
+            _close_client()
+            _default_client = DCIMClient(caching=False)
+            # read after creating the client, which may load the
+            # configuration file
+            _default_config = dcim.client.client_config
+        return _default_client
+
+
+def _close_client():
+    """
+    Close the shared default client if one was created.
+    """
+    if _default_client is not None:
+        _default_client.__exit__(None, None, None)
+
+atexit.register(_close_client)
+
+
 def locate(*args, **kwargs):
-    with DCIMClient(caching=True) as client:
-        return client.locate(*args, **kwargs)
+    return _get_client().locate(*args, **kwargs)
 
 locate.__doc__ = DCIMClient.locate.__doc__
 
 
 def model(*args, **kwargs):
-    with DCIMClient(caching=True) as client:
-        return client.model(*args, **kwargs)
+    return _get_client().model(*args, **kwargs)
 
 model.__doc__ = DCIMClient.model.__doc__
 
 
 def showrack(*args, **kwargs):
-    with DCIMClient(caching=True) as client:
-        return client.showrack(*args, **kwargs)
+    return _get_client().showrack(*args, **kwargs)
 
 showrack.__doc__ = DCIMClient.showrack.__doc__
-    
@@ -0,0 +1,107 @@
+"""
+Asyncio interface to the OpenDCIM client
+
+The ``AsyncDCIMClient`` wraps a ``DCIMClient`` and runs its blocking
+calls in a thread pool, so that coroutines can locate or describe many
+devices concurrently with ``asyncio.gather`` while sharing the pooled
+keep-alive connections and cache of a single client.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from dcim.client import DCIMClient
+from dcim.errors import DCIMNotFoundError
+
+
+# Number of client calls run concurrently by an AsyncDCIMClient
+MAX_WORKERS = 16
+
+
+class AsyncDCIMClient(object):
+    """
+    OpenDCIM client object providing coroutine versions of the
+    ``DCIMClient`` lookup methods.
+    """
+    def __init__(self, caching=False, client=None, max_workers=MAX_WORKERS):
+        """
+        :param bool caching: Cache the results of GET requests to the
+            server in memory if set to True
+        :param DCIMClient client: Existing client to wrap. If None, a new
+            client is created with the given caching setting. An existing
+            client is left open when this object is closed.
+        :param int max_workers: Maximum number of concurrent client calls
+        """
+        self._owns_client = client is None
+        if client is None:
+            client = DCIMClient(caching=caching)
+        self.client = client
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Stop the thread pool, and close the wrapped client if it was
+        created by this object.
+        """
+        self._executor.shutdown(wait=False)
+        if self._owns_client:
+            self.client.__exit__(None, None, None)
+
+    async def _call(self, func, *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def locate(self, device, identifier='Label'):
+        return await self._call(
+            self.client.locate, device, identifier=identifier
+        )
+
+    locate.__doc__ = DCIMClient.locate.__doc__
+
+    async def locate_many(self, devices, identifier='Label'):
+        """
+        Locate several devices concurrently. Devices that are not found
+        are omitted from the result.
+
+        :param list(str) devices: Labels or other identifiers of the
+            devices to be located
+        :param str identifier: Identifier, i.e. "Label" or "SerialNo"
+            for the devices
+        :returns: Results as returned by ``locate`` keyed by device
+        :rtype: dict
+        """
+        async def locate_or_none(device):
+            try:
+                return await self.locate(device, identifier=identifier)
+            except DCIMNotFoundError:
+                return None
+
+        results = await asyncio.gather(
+            *(locate_or_none(device) for device in devices)
+        )
+        return {
+            device: result for device, result in zip(devices, results)
+            if result is not None
+        }
+
+    async def model(self, device, dev_info=None):
+        return await self._call(self.client.model, device, dev_info=dev_info)
+
+    model.__doc__ = DCIMClient.model.__doc__
+
+    async def showrack(self, location, display=False, width=72,
+                       devinfo=False):
+        return await self._call(
+            self.client.showrack, location,
+            display=display, width=width, devinfo=devinfo
+        )
+
+    showrack.__doc__ = DCIMClient.showrack.__doc__
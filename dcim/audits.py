@@ -10,11 +10,16 @@ with a list of problems that could not or were not repaired, and
 a ``repairs`` field with a list of repairs performed.
 """
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 from dcim.client import DCIMClient
 from dcim.util import normalize_label, VALID_LABEL_RE
 
 
+# Number of device repairs to submit to the server concurrently
+REPAIR_WORKERS = 8
+
+
 class DCIMAudit:
     """
     Base class for all audits setting up attributes to store error
@@ -75,49 +80,78 @@ class AuditDeviceLabels(DCIMAudit):
         :rtype: dict
         """
         self.client = DCIMClient()
-        self.found_labels = defaultdict(list)
-
-        devs = self.client.get_all_devices()
-        for device in devs:
-            self._check_device_label(device, repair=repair)
-
-        for label in self.found_labels:
-            if len(self.found_labels[label]) > 1:
-                self.errors.append(
-                    'Duplicate label "{}" for device IDs: {}'
-                    .format(label, self.found_labels[label])
+        self.found_labels = found = defaultdict(list)
+        repairable = []
+
+        # bind lookups used for every device to locals
+        valid = VALID_LABEL_RE.search
+        add_repairable = repairable.append
+        add_error = self.errors.append
+
+        for device in self.client.iter_all_devices():
+            label = device['Label']
+            devid = device['DeviceID']
+            if valid(label):
+                found[label].append(devid)
+            elif repair:
+                add_repairable(device)
+            else:
+                found[label].append(devid)
+                add_error(
+                    'Invalid label "{}" for device {}'.format(label, devid)
                 )
 
+        if repairable:
+            with ThreadPoolExecutor(max_workers=REPAIR_WORKERS) as executor:
+                results = list(executor.map(self._try_repair, repairable))
+            for devid, label, repaired, message in results:
+                found[label].append(devid)
+                if repaired:
+                    self.repairs.append(message)
+                else:
+                    self.errors.append(message)
+
+        self.errors.extend(
+            'Duplicate label "{}" for device IDs: {}'.format(label, ids)
+            for label, ids in found.items() if len(ids) > 1
+        )
+
         # clear found_labels for subsequent uses of the perform method
         self.found_labels = defaultdict(list)
 
         return self._complete()
 
-    def _check_device_label(self, device, repair=False):
-        """audit the label of a single specified device"""
+    def _try_repair(self, device):
+        """
+        Normalize the label of a single device with an invalid label and
+        update it on the server if possible. Return a tuple of the device
+        ID, resulting label, whether a repair was made, and a message.
+        A failed update is reported as an error for that device only, so
+        that repairs made concurrently are still reported.
+        """
+        import requests
+
         label = device['Label']
         devid = device['DeviceID']
-
-        if VALID_LABEL_RE.search(label):
-            self.found_labels[label].append(devid)
-        elif repair:
-            try:
-                new_label = normalize_label(label)
-                self.client.update_device_by_id(devid, {'Label': new_label})
-                self.found_labels[new_label].append(devid)
-                self.repairs.append(
-                    'Modified device label for {}, "{}" --> "{}"'
-                    .format(devid, label, new_label)
-                )
-            except ValueError:
-                self.found_labels[label].append(devid)
-                self.errors.append(
-                    'Invalid and uncorrectable label "{}" for device {}'
-                    .format(label, devid)
-                )
-        else:
-            self.found_labels[label].append(devid)
-            self.errors.append(
-                'Invalid label "{}" for device {}'
+        try:
+            new_label = normalize_label(label)
+        except ValueError:
+            return (
+                devid, label, False,
+                'Invalid and uncorrectable label "{}" for device {}'
                 .format(label, devid)
             )
+
+        try:
+            self.client.update_device_by_id(devid, {'Label': new_label})
+        except requests.RequestException as err:
+            return (
+                devid, label, False,
+                'Failed to modify device label for {}, "{}" --> "{}": {}'
+                .format(devid, label, new_label, err)
+            )
+        return (
+            devid, new_label, True,
+            'Modified device label for {}, "{}" --> "{}"'
+            .format(devid, label, new_label)
+        )
@@ -16,6 +16,99 @@ the system /etc/dcim.conf file to ensure that a valid OpenDCIM host
 url and credentials have been set.
 """
 
+# Number of devices to query concurrently in commands accepting host lists
+MAX_WORKERS = 16
+
+
+def _run_per_device(func, devices):
+    """
+    Call ``func`` for each device concurrently, write the resulting
+    output in the original device order, and return the number of
+    devices for which ``func`` reported a failure. Output for failed
+    devices is written to standard error.
+
+    :param callable func: Function taking a single device and returning
+        a tuple ``(ok, output)`` where ``output`` may be None
+    :param list(str) devices: Devices to process
+    :returns: Number of failures
+    :rtype: int
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = list(executor.map(func, devices))
+
+    out = [output for ok, output in results if ok and output is not None]
+    errs = [output for ok, output in results if not ok]
+
+    if out:
+        sys.stdout.write('\n'.join(out) + '\n')
+    if errs:
+        sys.stdout.flush()
+        sys.stderr.write('\n'.join(errs) + '\n')
+    return len(errs)
+
+
+def _locate_one(client, device, identifier, parents=False, records=None):
+    """
+    Locate a single device for the locate command, using the device
+    information in ``records`` if it was already fetched in a batch.
+    """
+    dev_info = records.get(device) if records else None
+    try:
+        result = client.locate(
+            device, identifier=identifier, dev_info=dev_info
+        )
+    except DCIMNotFoundError:
+        return False, 'Device {} {} was not found.'.format(
+            identifier, device)
+
+    output = '{}: {}, {}, U{}'.format(
+        result['label'], result['datacenter'],
+        result['cabinet'], result['position'])
+    if result['parent_devices'] and parents:
+        output += '\n{}: parent devices: {}'.format(
+            device, result['parent_devices'])
+    return True, output
+
+
+def _model_one(client, device):
+    """Look up the make and model of a single device for the model command"""
+    try:
+        result = client.model(device)
+    except DCIMNotFoundError:
+        return False, 'Device label {} was not found.'.format(device)
+    return True, '{}: {} {} SN: {}'.format(device, result['make'],
+            result['model'], result['serial'])
+
+
+def _status_one(client, device):
+    """Look up the status of a single device for the status command"""
+    try:
+        result = client.status(device)
+    except DCIMNotFoundError:
+        return False, 'Device label {} was not found.'.format(device)
+    return True, '{}: status {}, owner {}'.format(device, result['status'],
+            result['owner'])
+
+
+def _setstatus_one(client, device, status):
+    """Set the status of a single device for the setstatus command"""
+    try:
+        client.set_device_status(device, status)
+    except DCIMNotFoundError:
+        return False, 'Device label {} was not found.'.format(device)
+    return True, None
+
+
+def _setowner_one(client, device, owner):
+    """Set the owner of a single device for the setowner command"""
+    try:
+        client.set_device_owner(device, owner)
+    except DCIMNotFoundError:
+        return False, 'Device label {} was not found.'.format(device)
+    return True, None
+
 
 def locate(args):
     """
@@ -42,21 +135,17 @@ def locate(args):
         devices = expand_hostlist(args.device)
         identifier = 'Label'
 
-    error_count = 0
     client = DCIMClient(caching=True)
-
-    for device in devices:
-        try:
-            result = client.locate(device, identifier=identifier)
-            print('{}: {}, {}, U{}'.format(
-                    result['label'], result['datacenter'],
-                    result['cabinet'], result['position']))
-            if result['parent_devices'] and args.parents:
-                print('{}: parent devices: {}'.format(
-                    device, result['parent_devices']))
-        except DCIMNotFoundError:
-            print('Device {} {} was not found.'.format(identifier, device))
-            error_count += 1
+    records = {}
+    if len(devices) > 1:
+        records = client.get_devices(devices, identifier=identifier)
+        client.index_parents(records.values())
+    error_count = _run_per_device(
+        lambda device: _locate_one(
+            client, device, identifier, args.parents, records
+        ),
+        devices
+    )
 
     if error_count:
         sys.exit(1)
@@ -77,17 +166,11 @@ def model(args):
     were located or 1 otherwise.
     """
     devices = expand_hostlist(args.device)
-    error_count = 0
     client = DCIMClient(caching=True)
-
-    for device in devices:
-        try:
-            result = client.model(device)
-            print('{}: {} {} SN: {}'.format(device, result['make'],
-                    result['model'], result['serial']))
-        except DCIMNotFoundError:
-            print('Device label {} was not found.'.format(device))
-            error_count += 1
+    error_count = _run_per_device(
+        lambda device: _model_one(client, device),
+        devices
+    )
 
     if error_count:
         sys.exit(1)
@@ -108,17 +191,11 @@ def status(args):
     were located or 1 otherwise.
     """
     devices = expand_hostlist(args.device)
-    error_count = 0
     client = DCIMClient(caching=True)
-
-    for device in devices:
-        try:
-            result = client.status(device)
-            print('{}: status {}, owner {}'.format(device, result['status'],
-                    result['owner']))
-        except DCIMNotFoundError:
-            print('Device label {} was not found.'.format(device))
-            error_count += 1
+    error_count = _run_per_device(
+        lambda device: _status_one(client, device),
+        devices
+    )
 
     if error_count:
         sys.exit(1)
@@ -152,15 +229,11 @@ def setstatus(args):
     were successfully modified or 1 otherwise.
     """
     devices = expand_hostlist(args.devices)
-    error_count = 0
     client = DCIMClient()
-
-    for device in devices:
-        try:
-            result = client.set_device_status(device, args.status)
-        except DCIMNotFoundError:
-            print('Device label {} was not found.'.format(device))
-            error_count += 1
+    error_count = _run_per_device(
+        lambda device: _setstatus_one(client, device, args.status),
+        devices
+    )
 
     if error_count:
         sys.exit(1)
@@ -181,15 +254,11 @@ def setowner(args):
     were successfully modified or 1 otherwise.
     """
     devices = expand_hostlist(args.devices)
-    error_count = 0
     client = DCIMClient()
-
-    for device in devices:
-        try:
-            result = client.set_device_owner(device, args.owner)
-        except DCIMNotFoundError:
-            print('Device label {} was not found.'.format(device))
-            error_count += 1
+    error_count = _run_per_device(
+        lambda device: _setowner_one(client, device, args.owner),
+        devices
+    )
 
     if error_count:
         sys.exit(1)
@@ -2,22 +2,142 @@
 Client wrapper for interactions with the OpenDCIM server and
 configuration.
 """
-import configparser
-import os.path
+import os
+import re
+import threading
+import time
 
-import requests
-import urllib3
+try:
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
 
 from dcim.errors import (
     DCIMConfigurationError,
     DCIMNotFoundError,
     DCIMAuthenticationError
 )
-from dcim.util import draw_rack
+from dcim.util import draw_rack, ExpiringCache
 
 
 client_config = None
 
+# Configuration file in use and parsed configurations keyed by file name,
+# each stored with the (mtime, size) signature of the file when parsed
+_conf_file = None
+_conf_cache = {}
+
+INI_SECTION_RE = re.compile(r'^\[([^\]]+)\]\s*$')
+INI_OPTION_RE = re.compile(r'^([A-Za-z_][\w-]*)\s*=\s*(.*?)\s*$')
+
+# Connection pool sizing for the HTTP adapters mounted on client sessions.
+# A client only talks to one server so few host pools are needed, while
+# each pool holds enough connections for the concurrent CLI and audit
+# requests.
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 32
+
+# Lifetimes in seconds of cached GET responses. Manufacturers, device
+# templates, and datacenters rarely change, while device and cabinet
+# records are expired quickly.
+STATIC_PATHS = ('api/v1/manufacturer', 'api/v1/devicetemplate',
+                'api/v1/datacenter')
+STATIC_TTL = 600
+DYNAMIC_TTL = 30
+CACHE_MAXSIZE = 1536
+
+# Lifetime in seconds of the index of all devices built by a client, and
+# the number of distinct parent devices worth fetching all devices for
+DEVICE_INDEX_TTL = 60
+DEVICE_INDEX_MIN_PARENTS = 25
+
+# Number of threads in the pool a client uses for concurrent requests,
+# e.g. by DCIMClient._mget
+MGET_WORKERS = 16
+
+# Maximum number of devices and querystring length of a single batched
+# device request, keeping request lines well below common server limits
+LOCATE_BATCH_SIZE = 100
+LOCATE_BATCH_QUERY_LENGTH = 4000
+
+
+def _cache_key(path, params=None):
+    """
+    Return the GET response cache key for a path and querystring
+    arguments given as a dict or a list of ``(key, value)`` tuples.
+    """
+    if not params:
+        return (path,)
+    if isinstance(params, dict):
+        params = params.items()
+    elif not isinstance(params, (list, tuple)):
+        raise TypeError(
+            'Cached GET query parameters must be a dict or a list of '
+            '(key, value) tuples, not {}'.format(type(params).__name__)
+        )
+    return (path, tuple(sorted(params)))
+
+
+def _cache_ttl(key):
+    """Return the cache lifetime for a GET response cache key"""
+    if key[0].startswith(STATIC_PATHS):
+        return STATIC_TTL
+    return DYNAMIC_TTL
+
+
+def _device_batches(devices, identifier):
+    """
+    Split devices into lists whose querystring, with the identifier
+    repeated for each device, stays within the batch limits.
+    """
+    from urllib.parse import quote_plus
+
+    batch = []
+    length = 0
+    for device in devices:
+        item_length = len(identifier) + len(quote_plus(str(device))) + 2
+        if batch and (len(batch) >= LOCATE_BATCH_SIZE or
+                      length + item_length > LOCATE_BATCH_QUERY_LENGTH):
+            yield batch
+            batch = []
+            length = 0
+        batch.append(device)
+        length += item_length
+    if batch:
+        yield batch
+
+
+def _copy_json(value):
+    """
+    Return a copy of decoded JSON data, copying nested objects and arrays.
+    """
+    if isinstance(value, dict):
+        return {
+            k: _copy_json(v) if isinstance(v, (dict, list)) else v
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [
+            _copy_json(v) if isinstance(v, (dict, list)) else v
+            for v in value
+        ]
+    return value
+
+
+class _CachedResponse(object):
+    """
+    Stand-in for a cached requests.Response holding the decoded JSON
+    body, so that cache hits do not decode the body again.
+    """
+    __slots__ = ('status_code', '_data')
+
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self._data = data
+
+    def json(self):
+        return self._data
+
 
 class DCIMClient(object):
     """
@@ -33,6 +153,11 @@ class DCIMClient(object):
         :param bool caching: Cache the results of GET requests to the
             server in memory if set to True
         """
+        # requests is imported on first use to keep CLI startup fast
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
         _maybe_set_configuration()
 
         self.session = requests.Session()
@@ -40,47 +165,273 @@ class DCIMClient(object):
             client_config['username'],
             client_config['password']
         )
+        adapter = HTTPAdapter(
+            pool_connections=POOL_CONNECTIONS,
+            pool_maxsize=POOL_MAXSIZE,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.2,
+                status_forcelist=[502, 503, 504],
+                raise_on_status=False
+            )
+        )
+        # verify is passed with every request, since a session setting
+        # is overridden by a CA bundle given in the environment
+        self._verify = client_config['ssl_verify']
+        self._baseurl = client_config['baseurl'].rstrip('/') + '/'
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive'
+        })
         self.caching = caching
-        self.cache = {}
+        self.cache = ExpiringCache(maxsize=CACHE_MAXSIZE, ttl=_cache_ttl)
+        self._executor_lock = threading.Lock()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._executor = None
+        self._auth_error = None
+        self._get_template = None
+        self._get_template_state = None
+        self._send_kwargs = None
+        self._device_index = None
+        self._device_index_ts = 0.0
 
     def __enter__(self):
         return self
 
     def __exit__(self, *args):
         self.session.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
 
-    def _request(self, method, path, **kwargs):
-        url = '{}/{}'.format(client_config['baseurl'], path)
-        if 'verify' not in kwargs and not client_config['ssl_verify']:
-            kwargs['verify'] = False
+    def _get_executor(self):
+        """
+        Return a thread pool shared by this client for issuing requests
+        in the background, creating it on first use.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=MGET_WORKERS)
+            return self._executor
 
-        resp = self.session.request(method, url, **kwargs)
+    def _request(self, method, path, **kwargs):
+        # credentials are fixed for the life of the client, so once they
+        # are rejected fail without contacting the server again
+        if self._auth_error is not None:
+            raise DCIMAuthenticationError(self._auth_error)
+
+        if method == 'GET' and kwargs.keys() <= {'params'}:
+            resp = self._send_get(path, kwargs.get('params'))
+        else:
+            kwargs.setdefault('verify', self._verify)
+            resp = self.session.request(
+                method, self._baseurl + path, **kwargs
+            )
         if resp.status_code == 401:
-            raise DCIMAuthenticationError(
+            self._auth_error = (
                 'OpenDCIM authentication failed, server response: {}'
                 .format(resp.text)
             )
+            raise DCIMAuthenticationError(self._auth_error)
         return resp
 
+    def _send_get(self, path, params=None):
+        """
+        Send a plain GET request by copying a request prepared with the
+        session headers, authentication, and environment settings, rather
+        than merging them for every request. The prepared request is
+        rebuilt whenever the session or those settings change, and
+        requests fall back to ``session.request`` while the session holds
+        cookies, since those may change between requests.
+        """
+        session = self.session
+        if session.cookies:
+            return session.request(
+                'GET', self._baseurl + path, params=params,
+                verify=self._verify
+            )
+
+        state = self._session_state()
+        if self._get_template is None or state != self._get_template_state:
+            import requests
+
+            self._get_template = session.prepare_request(
+                requests.Request('GET', self._baseurl)
+            )
+            self._send_kwargs = session.merge_environment_settings(
+                self._baseurl, {}, None, self._verify, None
+            )
+            self._get_template_state = state
+
+        if session.params:
+            from requests.sessions import merge_setting
+
+            params = merge_setting(params, session.params)
+        prep = self._get_template.copy()
+        prep.prepare_url(self._baseurl + path, params)
+        return session.send(prep, **self._send_kwargs)
+
+    def _session_state(self):
+        """
+        Return the session settings a prepared GET request depends on, to
+        tell whether a prepared request is still current.
+        """
+        session = self.session
+        return (
+            session,
+            dict(session.headers),
+            session.auth,
+            dict(session.proxies),
+            session.cert,
+            session.stream,
+            session.trust_env
+        )
+
+    def _json(self, resp):
+        """
+        Decode the JSON body of a response, using orjson if available.
+        """
+        if isinstance(resp, _CachedResponse):
+            return resp.json()
+        return _loads(resp.content)
+
+    def _copy(self, value):
+        """
+        Return decoded response data for a public method, copied if it may
+        be shared with the cache so callers are free to modify it.
+        """
+        return _copy_json(value) if self.caching else value
 
     def _drop_cache(self):
-        self.cache = {}
+        with self._inflight_lock:
+            self._inflight.clear()
+        self.cache.clear()
+        self._device_index = None
+
+    def _get_cabinet_by_id(self, cabinet_id):
+        """
+        Return cabinet information for a cabinet by CabinetID.
+        """
+        resp = self._get('api/v1/cabinet/{}'.format(cabinet_id))
+        return self._json(resp)['cabinet'][0]
+
+    def _get_cabinet_location(self, cabinet_id):
+        """
+        Return the location and datacenter name of a cabinet by CabinetID.
+        """
+        cab_info = self._get_cabinet_by_id(cabinet_id)
+        dc_info = self._get_datacenter_by_id(cab_info['DataCenterID'])
+        return cab_info['Location'], dc_info['Name']
+
+    def _get_datacenter_by_id(self, datacenter_id):
+        """
+        Return datacenter information for a datacenter by DataCenterID.
+        """
+        resp = self._get('api/v1/datacenter/{}'.format(datacenter_id))
+        return self._json(resp)['datacenter'][0]
 
     def _get(self, path, **kwargs):
         """
         Perform a GET request with the given path or return result already
         held in the cache. The cache is keyed using the path and possible
-        querystring arguments.
+        querystring arguments, given either as a dict or a list of
+        ``(key, value)`` tuples. Threads missing the cache for a key
+        already being fetched wait for that request instead of sending
+        their own.
+
+        Only successful responses are cached. They expire after a lifetime
+        depending on the path, and JSON responses are cached decoded. The
+        decoded data is shared between cache hits and should not be
+        modified.
         """
-        if self.caching:
-            key = (path, frozenset(kwargs.get('params', {}).items()))
-            if key in self.cache:
-                return self.cache[key]
+        if not self.caching:
+            return self._request('GET', path, **kwargs)
+
+        from concurrent.futures import Future
+
+        key = _cache_key(path, kwargs.get('params'))
+        resp = self.cache.get(key)
+        if resp is not None:
+            return resp
+
+        # concurrent misses for the same key wait for a single request
+        with self._inflight_lock:
+            resp = self.cache.get(key)
+            if resp is not None:
+                return resp
+            future = self._inflight.get(key)
+            if future is not None:
+                waiting = True
             else:
-                self.cache[key] = self._request('GET', path, **kwargs)
-                return self.cache[key]
+                waiting = False
+                future = self._inflight[key] = Future()
+        if waiting:
+            return future.result()
 
-        return self._request('GET', path, **kwargs)
+        try:
+            resp = self._request('GET', path, **kwargs)
+            try:
+                resp = _CachedResponse(resp.status_code, self._json(resp))
+            except ValueError:
+                pass
+        except BaseException as e:
+            with self._inflight_lock:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._inflight_lock:
+            # the cache may have been dropped while the request was sent,
+            # and errors are not cached so that they are retried
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+                if 200 <= resp.status_code < 300:
+                    self.cache[key] = resp
+        future.set_result(resp)
+        return resp
+
+    def _mget(self, specs, fail_silently=False):
+        """
+        Perform several independent GET requests concurrently in the
+        client's thread pool, returning the responses in the order given.
+        Identical requests are sent once and their response is repeated.
+
+        :param list specs: ``(path, params)`` tuples, where ``params`` may
+            be None if the request has no querystring arguments
+        :param bool fail_silently: If True, return None in place of the
+            response of a request failing with a requests exception
+        :returns: Responses for each request
+        :rtype: list
+        """
+        import requests
+
+        def fetch(spec):
+            try:
+                return self._get(spec[0], params=spec[1] or {})
+            except requests.RequestException:
+                if not fail_silently:
+                    raise
+                return None
+
+        keys = [_cache_key(path, params) for path, params in specs]
+        unique = {}
+        for key, spec in zip(keys, specs):
+            unique.setdefault(key, spec)
+
+        if not unique:
+            return []
+        if len(unique) == 1:
+            responses = [fetch(spec) for spec in unique.values()]
+        else:
+            responses = self._get_executor().map(fetch, unique.values())
+        found = dict(zip(unique, responses))
+        return [found[key] for key in keys]
 
     def get_device(self, device, identifier='Label'):
         """
@@ -95,9 +446,16 @@ class DCIMClient(object):
         :returns: Information about the device
         :rtype: dict
         """
+        return self._copy(self._get_device(device, identifier))
+
+    def _get_device(self, device, identifier='Label'):
+        """
+        Return device information as described in ``get_device``, which
+        may be shared with the cache and must not be modified.
+        """
         resp = self._get('api/v1/device', params={identifier: device})
         try:
-            return resp.json()['device'][0]
+            return self._json(resp)['device'][0]
         except IndexError:
             raise DCIMNotFoundError(
                 'Device {} {} was not found.'.format(identifier, device)
@@ -110,8 +468,40 @@ class DCIMClient(object):
         :returns: Information about all devices
         :rtype: list(dict)
         """
+        return self._copy(self._get_all_devices())
+
+    def _get_all_devices(self):
+        """
+        Return device information as described in ``get_all_devices``,
+        which may be shared with the cache and must not be modified.
+        """
         resp = self._get('api/v1/device')
-        return resp.json()['device']
+        return self._json(resp)['device']
+
+    def iter_all_devices(self):
+        """
+        Yield device information for all devices in OpenDCIM one device
+        at a time.
+
+        If the ``ijson`` package is installed and caching is disabled, the
+        response is streamed and each device is yielded as soon as it has
+        been received. Otherwise the full response is decoded first.
+
+        :returns: Information about all devices
+        :rtype: iterator(dict)
+        """
+        try:
+            import ijson
+        except ImportError:
+            ijson = None
+
+        if ijson is None or self.caching:
+            yield from self.get_all_devices()
+            return
+
+        with self._request('GET', 'api/v1/device', stream=True) as resp:
+            resp.raw.decode_content = True
+            yield from ijson.items(resp.raw, 'device.item', use_float=True)
 
     def update_device_by_id(self, device_id, updates):
         """
@@ -128,7 +518,7 @@ class DCIMClient(object):
         )
         resp.raise_for_status()
 
-    def locate(self, device, identifier='Label'):
+    def locate(self, device, identifier='Label', dev_info=None):
         """
         Returns the datacenter, cabinet, and rack position of the specified
         device, as well as a list of parent devices.
@@ -140,31 +530,139 @@ class DCIMClient(object):
             to be located
         :param str identifier: Identifier, i.e. "Label" or "SerialNo"
             for the device
+        :param dict dev_info: Device information already retrieved from
+            the OpenDCIM. If None, the information will be fetched.
         :returns: The datacenter, cabinet, and rack position of the device,
             a list of parent devices, and device label
         :rtype: dict
         """
-        dev_info = self.get_device(device, identifier=identifier)
+        if dev_info is None:
+            dev_info = self._get_device(device, identifier=identifier)
+        return self._locate_device(dev_info)
+
+    def get_devices(self, devices, identifier='Label'):
+        """
+        Return device information for several devices, fetched in batches
+        with the identifier repeated in the querystring of each request.
+
+        Batches are kept to at most ``LOCATE_BATCH_SIZE`` devices and a
+        querystring of about ``LOCATE_BATCH_QUERY_LENGTH`` characters. A
+        batch that fails or is answered with anything but a list of
+        devices is treated as returning no devices, as is a server that
+        only honors the last repeated argument, so callers should look
+        up missing devices individually.
+
+        :param list(str) devices: Labels or other identifiers of the
+            devices
+        :param str identifier: Identifier, i.e. "Label" or "SerialNo"
+            for the devices
+        :returns: Information about each device found keyed by device
+        :rtype: dict
+        """
+        specs = [
+            ('api/v1/device', [(identifier, device) for device in batch])
+            for batch in _device_batches(devices, identifier)
+        ]
+        found = {}
+        for resp in self._mget(specs, fail_silently=True):
+            for dev_info in self._batch_devices(resp):
+                found.setdefault(str(dev_info[identifier]), dev_info)
+        return {
+            device: self._copy(found[device])
+            for device in devices if device in found
+        }
+
+    def _batch_devices(self, resp):
+        """
+        Return the devices of a batched device response, or an empty list
+        if the request failed or the response is not a list of devices.
+        """
+        if resp is None or not 200 <= resp.status_code < 300:
+            return []
+        try:
+            devices = self._json(resp)['device']
+        except (ValueError, KeyError, TypeError):
+            return []
+        if not isinstance(devices, list):
+            return []
+        return [d for d in devices if isinstance(d, dict)]
+
+    def locate_many(self, devices, identifier='Label', fallback=True):
+        """
+        Locate several devices, fetching the device records in batches
+        as described in ``get_devices`` and resolving parent devices
+        concurrently.
+
+        Devices missing from the batch responses are located one at a
+        time unless ``fallback`` is False. Devices that are not found are
+        omitted from the result.
+
+        :param list(str) devices: Labels or other identifiers of the
+            devices to be located
+        :param str identifier: Identifier, i.e. "Label" or "SerialNo"
+            for the devices
+        :param bool fallback: Locate devices missing from the batch
+            responses individually if True
+        :returns: Results as returned by ``locate`` keyed by device
+        :rtype: dict
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        records = self.get_devices(devices, identifier=identifier)
+        self.index_parents(records.values())
+        if not fallback:
+            devices = [device for device in devices if device in records]
+
+        def locate_one(device):
+            try:
+                return self.locate(
+                    device, identifier=identifier,
+                    dev_info=records.get(device)
+                )
+            except DCIMNotFoundError:
+                return None
+
+        if not devices:
+            return {}
+        # locating a device waits on requests submitted to the shared
+        # executor, so the devices are located in a pool of their own
+        workers = min(MGET_WORKERS, len(devices))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(locate_one, devices))
+        return {
+            device: result for device, result in zip(devices, results)
+            if result is not None
+        }
+
+    def _locate_device(self, dev_info):
+        """
+        Return the location of a device given its device information
+        as described in ``locate``.
+        """
         label = dev_info['Label']
 
+        # Devices in a chassis normally share the cabinet of their parent,
+        # so look the cabinet up while walking the chain of parents.
+        cabinet_id = dev_info['Cabinet']
+        prefetch = None
+        if dev_info['ParentDevice'] and cabinet_id:
+            prefetch = self._get_executor().submit(
+                self._get_cabinet_location, cabinet_id
+            )
+
         parents = []
         while dev_info['ParentDevice']:
-            resp = self._get(
-                'api/v1/device/{}'.format(dev_info['ParentDevice'])
-            )
-            dev_info = resp.json()['device']
+            dev_info = self._get_parent_device(dev_info['ParentDevice'])
             parents.append(dev_info['Label'])
 
         position = dev_info['Position']
 
-        resp = self._get('api/v1/cabinet/{}'.format(dev_info['Cabinet']))
-        cab_info = resp.json()['cabinet'][0]
-        location = cab_info['Location']
-
-        resp = self._get(
-            'api/v1/datacenter/{}'.format(cab_info['DataCenterID'])
-        )
-        datacenter = resp.json()['datacenter'][0]['Name']
+        if prefetch is not None and dev_info['Cabinet'] == cabinet_id:
+            location, datacenter = prefetch.result()
+        else:
+            location, datacenter = self._get_cabinet_location(
+                dev_info['Cabinet']
+            )
 
         return {
             'datacenter': datacenter,
@@ -174,6 +672,56 @@ class DCIMClient(object):
             'label': label
         }
 
+    def _get_parent_device(self, parent_id):
+        """
+        Return device information for a parent device by DeviceID, from
+        the device index if it is built and current or else from the server.
+        """
+        index = self._device_index
+        if (index is not None and
+                time.monotonic() - self._device_index_ts <= DEVICE_INDEX_TTL):
+            dev_info = index.get(int(parent_id))
+            if dev_info is not None:
+                return dev_info
+        resp = self._get('api/v1/device/{}'.format(parent_id))
+        return self._json(resp)['device']
+
+    def index_parents(self, devices):
+        """
+        Prepare to locate the given devices by building an index of all
+        devices, so that their parent devices are found without a request
+        per parent. The index is only built by caching clients and if the
+        devices have at least ``DEVICE_INDEX_MIN_PARENTS`` distinct
+        parents, as it takes a request for all devices in OpenDCIM.
+
+        :param list(dict) devices: Information about the devices to be
+            located, e.g. as returned by ``get_devices``
+        """
+        if not self.caching:
+            return
+        parents = {d['ParentDevice'] for d in devices if d['ParentDevice']}
+        if len(parents) >= DEVICE_INDEX_MIN_PARENTS:
+            self._ensure_device_index()
+
+    def _ensure_device_index(self, ttl=DEVICE_INDEX_TTL):
+        """
+        Build an index of all devices keyed by DeviceID unless one newer
+        than ``ttl`` seconds exists, so that chains of parent devices are
+        resolved without a request per parent. This is worthwhile before
+        locating many devices in chassis.
+
+        :param float ttl: Maximum age in seconds of an existing index
+        :returns: All devices keyed by DeviceID
+        :rtype: dict
+        """
+        now = time.monotonic()
+        if self._device_index is None or now - self._device_index_ts > ttl:
+            self._device_index = {
+                int(d['DeviceID']): d for d in self._get_all_devices()
+            }
+            self._device_index_ts = now
+        return self._device_index
+
     def get_cabinet(self, location):
         """
         Return cabinet information for a cabinet by location.
@@ -185,9 +733,16 @@ class DCIMClient(object):
         :returns: Information about the cabinet
         :rtype: dict
         """
+        return self._copy(self._get_cabinet(location))
+
+    def _get_cabinet(self, location):
+        """
+        Return cabinet information as described in ``get_cabinet``, which
+        may be shared with the cache and must not be modified.
+        """
         resp = self._get('api/v1/cabinet', params={'Location': location})
         try:
-            return resp.json()['cabinet'][0]
+            return self._json(resp)['cabinet'][0]
         except IndexError:
             raise DCIMNotFoundError(
                 'Cabinet at location {} was not found.'.format(location)
@@ -208,11 +763,18 @@ class DCIMClient(object):
         :returns: Information about all devices in the cabinet
         :rtype: list(dict)
         """
-        cabinet = self.get_cabinet(location)
+        return self._copy(self._get_cabinet_devices(location, nochildren))
+
+    def _get_cabinet_devices(self, location, nochildren=False):
+        """
+        Return device information as described in ``get_cabinet_devices``,
+        which may be shared with the cache and must not be modified.
+        """
+        cabinet = self._get_cabinet(location)
         cabinet_id = cabinet['CabinetID']
 
         resp = self._get('api/v1/device', params={'Cabinet': cabinet_id})
-        devices = resp.json()['device']
+        devices = self._json(resp)['device']
         if nochildren:
             return [d for d in devices if not d['ParentDevice']]
         return devices
@@ -233,12 +795,20 @@ class DCIMClient(object):
         :returns: ASCII-art representation of the cabinet
         :rtype: list(str)
         """
-        cabinet = self.get_cabinet(location)
+        cabinet = self._get_cabinet(location)
         height = int(cabinet['CabinetHeight'])
-        cabinet_id = cabinet['CabinetID']
 
-        devices = self.get_cabinet_devices(location)
-        parents = [d for d in devices if not d['ParentDevice']]
+        devices = self._get_cabinet_devices(location)
+        parents = []
+        children_by_parent = {}
+        for dev in devices:
+            parent_id = dev['ParentDevice']
+            if parent_id:
+                children_by_parent.setdefault(parent_id, []).append(dev)
+            else:
+                parents.append(dev)
+        if devinfo:
+            makes, templates = self._get_makes_and_templates(parents)
         labels = []
         positions = []
         heights = []
@@ -247,11 +817,11 @@ class DCIMClient(object):
             label = dev['Label']
             positions.append(dev['Position'])
             heights.append(dev['Height'])
-            children = [
-                d for d in devices if d['ParentDevice'] == dev['DeviceID']
-            ]
+            children = children_by_parent.get(dev['DeviceID'], ())
             if devinfo:
-                info = self.model(dev['Label'], dev_info=dev)
+                info = self._model_with_makes(
+                    dev, makes, templates.get(dev['TemplateID'])
+                )
                 if info['make'] is None:
                     info['make'] = 'Unknown Model'
                     info['model'] = ''
@@ -287,20 +857,70 @@ class DCIMClient(object):
         :rtype: dict
         """
         if dev_info is None:
-            dev_info = self.get_device(device)
+            dev_info = self._get_device(device)
+        makes = self._get_manufacturers() if dev_info['TemplateID'] else None
+        return self._model_with_makes(dev_info, makes)
+
+    def _get_makes_and_templates(self, devices):
+        """
+        Fetch the manufacturer names and the templates of the given
+        devices concurrently, returning a dict of manufacturer names
+        keyed by ManufacturerID and a dict of template information keyed
+        by TemplateID.
+        """
+        template_ids = list({
+            d['TemplateID'] for d in devices if d['TemplateID']
+        })
+        specs = [
+            ('api/v1/devicetemplate/{}'.format(t), None)
+            for t in template_ids
+        ]
+        specs.append(('api/v1/manufacturer', None))
+
+        responses = self._mget(specs)
+        makes = self._get_manufacturers(responses.pop())
+        templates = {
+            t: self._json(resp)['template']
+            for t, resp in zip(template_ids, responses)
+        }
+        return makes, templates
+
+    def _get_manufacturers(self, resp=None):
+        """
+        Return a dict of manufacturer names keyed by ManufacturerID.
+
+        :param resp: Response of an already performed manufacturer
+            request to use instead of fetching the manufacturers
+        """
+        if resp is None:
+            resp = self._get('api/v1/manufacturer')
+        return {
+            int(m['ManufacturerID']): m['Name']
+            for m in self._json(resp)['manufacturer']
+        }
+
+    def invalidate_manufacturers(self):
+        """
+        Discard the cached manufacturer names so that they are fetched
+        again on next use, e.g. after a manufacturer was added or renamed.
+        """
+        self.cache.pop(_cache_key('api/v1/manufacturer'), None)
+
+    def _model_with_makes(self, dev_info, makes, template_info=None):
+        """
+        Return the make, model, and serial number of a device as
+        described in ``model`` given the device information and a dict
+        of manufacturer names keyed by ManufacturerID. The device template
+        is fetched unless its information is given.
+        """
         template = dev_info['TemplateID']
         serial = dev_info['SerialNo']
         if not template:
             return {'make': None, 'model': None, 'serial': serial}
 
-        resp = self._get('api/v1/manufacturer')
-        makes = {
-            int(m['ManufacturerID']): m['Name']
-            for m in resp.json()['manufacturer']
-        }
-
-        resp = self._get('api/v1/devicetemplate/{}'.format(template))
-        template_info = resp.json()['template']
+        if template_info is None:
+            resp = self._get('api/v1/devicetemplate/{}'.format(template))
+            template_info = self._json(resp)['template']
         return {
             'make': makes[int(template_info['ManufacturerID'])],
             'model': template_info['Model'],
@@ -325,7 +945,7 @@ class DCIMClient(object):
         resp = self._get('api/v1/department')
         depts = {
             int(m['DeptID']): m['Name']
-            for m in resp.json()['department']
+            for m in self._json(resp)['department']
         }
         depts[0] = 'Unassigned'
 
@@ -379,7 +999,7 @@ class DCIMClient(object):
         resp = self._get('api/v1/department')
         depts = {
             m['Name']: int(m['DeptID'])
-            for m in resp.json()['department']
+            for m in self._json(resp)['department']
         }
         depts['Unassigned'] = 0
         if owner not in depts:
@@ -405,10 +1025,22 @@ def configure(baseurl, username, password, ssl_verify=True):
     client_config = {
         'baseurl': baseurl,
         'username': username,
-        'password': password
+        'password': password,
+        'ssl_verify': ssl_verify
     }
     if not ssl_verify:
-        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        _disable_tls_warnings()
+
+
+def _disable_tls_warnings():
+    """
+    Silence urllib3 warnings about unverified HTTPS requests, importing
+    urllib3 only when certificate verification is turned off.
+    """
+    from urllib3.exceptions import InsecureRequestWarning
+    from urllib3 import disable_warnings
+
+    disable_warnings(InsecureRequestWarning)
 
 
 def _maybe_set_configuration():
@@ -420,29 +1052,66 @@ def _maybe_set_configuration():
     if client_config is not None:
         return
 
+    client_config = _parse_config_file(_find_config_file())
+
+
+def _find_config_file():
+    """
+    Return the path of the user or system configuration file. The path
+    found is remembered and only searched for again if it disappears.
+    """
+    global _conf_file
+    if _conf_file is not None and os.path.isfile(_conf_file):
+        return _conf_file
+
     conf_file = os.path.expanduser('~/.dcim.conf')
     if not os.path.isfile(conf_file):
         conf_file = '/etc/dcim.conf'
     if not os.path.isfile(conf_file):
         conf_file = '/usr/local/etc/dcim.conf'
 
-    client_config = _parse_config_file(conf_file)
+    _conf_file = conf_file
+    return conf_file
 
 
 def _parse_config_file(filename):
     """
-    Parse the specified configuration file
+    Parse the specified configuration file. Results are cached on the
+    file modification time and size so an unchanged file is parsed once.
 
     :returns: Configured baseurl, username, and password
     :rtype: dict
     """
     try:
-        config = configparser.ConfigParser()
-        config.read(filename)
+        st = os.stat(filename)
+    except OSError:
+        raise DCIMConfigurationError() from None
+
+    signature = (st.st_mtime_ns, st.st_size)
+    cached = _conf_cache.get(filename)
+    if cached is None or cached[0] != signature:
+        cached = (signature, _read_config_file(filename))
+        _conf_cache[filename] = cached
+    return dict(cached[1])
+
+
+def _read_config_file(filename):
+    """
+    Parse the specified configuration file.
+    """
+    try:
+        with open(filename) as conf:
+            text = conf.read()
+        config = _parse_simple_ini(text)
+        if config is None:
+            import configparser
+            config = configparser.ConfigParser()
+            config.read_string(text, source=filename)
+
         ssl_verify = True
         if config['dcim'].get('ssl_verify', '').lower() == 'false':
             ssl_verify = False
-            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+            _disable_tls_warnings()
         return {
             'baseurl': config['dcim']['baseurl'],
             'username': config['dcim']['username'],
@@ -451,3 +1120,44 @@ def _parse_config_file(filename):
         }
     except Exception:
         raise DCIMConfigurationError()
+
+
+def _parse_simple_ini(text):
+    """
+    Parse INI text consisting only of section headers and ``key = value``
+    lines into a dict of sections, each a dict of lowercased keys.
+
+    Return None if the text uses any other syntax that configparser
+    handles differently, i.e. comments, continuation lines, ``:``
+    delimiters, ``%`` interpolation, or repeated sections and keys.
+
+    :param str text: INI file contents
+    :returns: Options keyed by section, or None
+    :rtype: dict
+    """
+    if '#' in text or ';' in text or '%' in text:
+        return None
+
+    sections = {}
+    current = None
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+
+        match = INI_SECTION_RE.match(line)
+        if match:
+            name = match.group(1)
+            if name == 'DEFAULT' or name in sections:
+                return None
+            current = sections[name] = {}
+            continue
+
+        match = INI_OPTION_RE.match(line)
+        if match is None or current is None:
+            return None
+        key = match.group(1).lower()
+        if key in current:
+            return None
+        current[key] = match.group(2)
+
+    return sections
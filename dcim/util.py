@@ -1,15 +1,48 @@
 """
 General stand-alone utility functions for internal package use
 """
+import functools
 import re
-import string
+import sys
+import threading
+import time
+from collections import OrderedDict
 
 
 RE_ISNUM = re.compile('[0-9]+')
-RE_NEXTBRACKET = re.compile('([^[]*)\[([^]]*)\](.*)')
+
+# A host list of a single item ending in its only set of brackets
+RE_SINGLEBRACKET = re.compile(r'([^,[\]]*)\[([^[\]]*)\]')
+
+# Brackets and the separator of items in a host list
+RE_HOSTLIST_SPECIAL = re.compile(r'[\[\],]')
 
 VALID_LABEL_RE = re.compile(r"^[a-z0-9-]*$")
 
+# Characters replaced by "-" in normalized labels. The translation table
+# covers ASCII whitespace, while the regular expression also matches
+# other whitespace characters.
+LABEL_SEPARATORS = str.maketrans(dict.fromkeys(' \t\n\r\x0b\x0c_.:', '-'))
+RE_LABEL_SEPARATORS = re.compile(r"[\s\-_\.:]+")
+
+# Tokens of dhcpd.conf files, each preceded by any whitespace and comments
+# to skip. Quoted strings are captured with the following character if it
+# may not follow a close quote, and unquoted words with a quote running
+# directly into them. An unterminated quote swallows the rest of the input.
+# Trailing whitespace and comments match the end of the input, so that the
+# scan never backtracks into a comment.
+DHCPD_TOKEN_RE = re.compile(r"""
+    (?:[ \t\n\r\x0b\x0c]+|\#[^\n]*)*
+    (?:
+        (?P<sep>[,;])
+      | (?P<quote>["'])(?P<quoted>.*?)(?P=quote)
+            (?P<badchar>[^ \t\n\r\x0b\x0c,;\#])?
+      | ["'].*
+      | (?P<word>[^ \t\n\r\x0b\x0c,;\#'"]+)(?P<badquote>['"])?
+      | \Z
+    )
+""", re.VERBOSE | re.DOTALL)
+
 
 def expand_hostlist(hostlist, max_depth=20):
     """
@@ -23,19 +56,41 @@ def expand_hostlist(hostlist, max_depth=20):
     :returns: list of hostnames
     :rtype: list(str)
     """
+    # fast path for plain comma-separated host names
+    if '[' not in hostlist and ']' not in hostlist and max_depth > 0:
+        result = hostlist.split(',')
+        if '' in result:
+            if result.index('') < len(result) - 1:
+                raise ValueError('Missing item between separator')
+            raise ValueError('Missing item after separator')
+        return result
+
+    # fast path for the common form of a single bracketed range
+    match = RE_SINGLEBRACKET.fullmatch(hostlist)
+    if match and max_depth > 1:
+        prefix, numlist = match.groups()
+        return [prefix + num for num in expand_numlist(numlist)]
+
     result = _split_outside_brackets(hostlist, ',')
+    pending = sum(1 for host in result if host.endswith(']'))
     depth = 0
     while depth < max_depth:
-        if not any(host.endswith(']') for host in result):
+        if not pending:
             return result
         depth += 1
 
         new_result = []
+        pending = 0
         for item in result:
             if not item.endswith(']'):
                 new_result.append(item)
-            else:
-                new_result.extend(_expand_next_bracket(item))
+                continue
+            expanded = _expand_next_bracket(item)
+            new_result.extend(expanded)
+            # expanded hosts share a suffix, so either all or none of
+            # them still end in a bracket
+            if expanded[-1].endswith(']'):
+                pending += len(expanded)
 
         result = new_result
 
@@ -51,30 +106,33 @@ def _split_outside_brackets(raw, splitchar):
     Copied from https://github.com/appeltel/slurmlint
     """
     result = []
-    word = ''
+    start = 0
     in_brackets = False
-    for char in raw:
-        if char == '[' and not in_brackets:
-            word = word + char
+    if splitchar == ',':
+        special = RE_HOSTLIST_SPECIAL
+    else:
+        special = re.compile(r'[\[\]' + re.escape(splitchar) + ']')
+    for match in special.finditer(raw):
+        char = match.group()
+        idx = match.start()
+        if char == '[':
+            if in_brackets:
+                raise ValueError('Nested brackets are right out')
             in_brackets = True
-        elif char == '[' and in_brackets:
-            raise ValueError('Nested brackets are right out')
-        elif char == ']' and in_brackets:
-            word = word + char
+        elif char == ']':
+            if not in_brackets:
+                raise ValueError('Unmatched end-bracket')
             in_brackets = False
-        elif char == ']' and not in_brackets:
-            raise ValueError('Unmatched end-bracket')
-        elif not in_brackets and char == splitchar and word:
-            result.append(word)
-            word = ''
-        elif not in_brackets and char == splitchar and not word:
-            raise ValueError('Missing item between separator')
-        else:
-            word = word + char
-    if not word:
+        elif not in_brackets:
+            if idx == start:
+                raise ValueError('Missing item between separator')
+            result.append(raw[start:idx])
+            start = idx + 1
+
+    if start == len(raw):
         raise ValueError('Missing item after separator')
-        
-    result.append(word)
+
+    result.append(raw[start:])
     return result
 
 
@@ -90,13 +148,14 @@ def _expand_next_bracket(hostlist):
         raise ValueError(
             'Invalid host list, not ending in bracket'
         )
-    match = RE_NEXTBRACKET.match(hostlist)
-    if not match:
+    start = hostlist.find('[')
+    end = hostlist.find(']', start + 1) if start >= 0 else -1
+    if end < 0:
         raise ValueError('Invalid brackets in host list')
-    prefix = match.group(1)
-    numlist = match.group(2)
-    suffix = match.group(3)
-    return [prefix + num + suffix for num in expand_numlist(numlist)] 
+    prefix = hostlist[:start]
+    suffix = hostlist[end + 1:]
+    numlist = hostlist[start + 1:end]
+    return [prefix + num + suffix for num in expand_numlist(numlist)]
 
 
 def expand_numlist(raw):
@@ -132,17 +191,17 @@ def _expand_numrange(first, last):
     """
     if not RE_ISNUM.match(first) or not RE_ISNUM.match(last):
         raise ValueError('Invalid numeric value')
-    if int(last) < int(first):
+    stop = int(last) + 1
+    start = int(first)
+    if stop <= start:
         raise ValueError('Invalid range')
 
     fixed = first.startswith('0')
     if fixed:
-        return [
-            str(val).zfill(len(first))
-            for val in range(int(first), int(last) + 1)
-        ]
+        digits = len(first)
+        return [str(val).zfill(digits) for val in range(start, stop)]
 
-    return [str(val) for val in range(int(first), int(last) + 1)]
+    return list(map(str, range(start, stop)))
 
 
 def draw_rack(
@@ -166,49 +225,92 @@ def draw_rack(
         one per line.
     :rtype: list(str)
     """
-    devices = list(zip(positions, heights, labels))
-    devices.sort(reverse=True)
-    devices.insert(0, None)
+    drawing = list(_draw_rack_lines(
+        height, width, tuple(labels), tuple(positions), tuple(heights)
+    ))
+
+    if display:
+        sys.stdout.write('\n'.join(drawing) + '\n')
+
+    return drawing
+
+
+@functools.lru_cache(maxsize=256)
+def _draw_rack_lines(height, width, labels, positions, heights):
+    """
+    Return the lines drawn by ``draw_rack`` as a tuple. Drawings are
+    memoized, since the same racks are often drawn repeatedly.
+    """
+    devices = iter(sorted(zip(positions, heights, labels)))
 
     spacer = '+----+' + '-'*width + '+'
     emptyslot = '|    |' + ' '*width + '|'
-
-    drawing = []
+    empty_fill = ' '*width + '|'
+    device_slot = '|    ||' + ' '*(width-2) + '||'
+    device_fill = '|' + ' '*(width-2) + '||'
+
+    # devices at the top of the rack may extend above its height
+    top = max([height] + [
+        p + h - 1 for p, h in zip(positions, heights) if p <= height
+    ])
+    u_labels = ['|U{:03}|'.format(u) for u in range(top + 1)]
+
+    # the drawing is filled from the bottom of the rack at the end of the
+    # list, and any lines left unused at the start are removed afterwards
+    w = 2*top
+    drawing = [None] * (w + 1)
     u = 1
     device_top = True
-    current_device = devices.pop()
+    current_device = next(devices, None)
 
     while (u <= height):
         if current_device and current_device[0] == u:
-            drawing.append(spacer)
+            drawing[w] = spacer
             label = current_device[2][:width-3].ljust(width-3)
-            drawing.append('|U{:03}|| {}||'.format(u, label))
+            drawing[w-1] = u_labels[u] + '| ' + label + '||'
+            w -= 2
             u += 1
             for _ in range(current_device[1] - 1):
-                drawing.append('|    ||' + ' '*(width-2) + '||')
-                drawing.append('|U{:03}||{}||'.format(u, ' '*(width-2)))
+                drawing[w] = device_slot
+                drawing[w-1] = u_labels[u] + device_fill
+                w -= 2
                 u += 1
-            current_device = devices.pop()
+            current_device = next(devices, None)
             device_top = True
         else:
-            if device_top:
-                drawing.append(spacer)
-            else:
-                drawing.append(emptyslot)
-            drawing.append('|U{:03}|{}|'.format(u, ' '*width))
+            drawing[w] = spacer if device_top else emptyslot
+            drawing[w-1] = u_labels[u] + empty_fill
+            w -= 2
             device_top = False
             u += 1
 
-    drawing.append(spacer)
-    drawing.reverse()
+    drawing[w] = spacer
+    return tuple(drawing[w:])
 
-    if display:
-        for line in drawing:
-            print(line)
 
-    return drawing
+def draw_rack_str(height, width=64, labels=(), positions=(), heights=()):
+    """
+    Create an ASCII-art representation of a server rack as by
+    ``draw_rack``, returned as a single string without printing it.
+
+    :param int height: The height of the rack (U)
+    :param int width: Display width to reserve for labels
+    :param list(str) labels: Names of the devices in the rack
+    :param list(int) positions: Positions of the devices in the rack
+    :param list(int) heights: Heights of the devices in the rack
+
+    :returns: ASCII-art representation of the rack, with lines separated
+        by newlines and no trailing newline.
+    :rtype: str
+    """
+    return '\n'.join(draw_rack(
+        height, width=width,
+        labels=labels, positions=positions, heights=heights,
+        display=False
+    ))
 
 
+@functools.lru_cache(maxsize=4096)
 def normalize_label(raw_label):
     """
     Normalize a label (str) to a policy of only containing lowercase
@@ -219,12 +321,21 @@ def normalize_label(raw_label):
 
     If the label cannot be normalized in this manner, raise a ValueError.
 
+    Results are memoized for the most recently normalized labels, which
+    may be checked again by repeated audits.
+
     :param str raw_label: Device label to be normalized
     :returns: Normalized label
     """
-    label = raw_label.strip().lower()
-    label = re.sub(r"[\s\-_\.:]+", '-', label)
+    label = raw_label.strip().lower().translate(LABEL_SEPARATORS)
+    while '--' in label:
+        label = label.replace('--', '-')
+
+    if VALID_LABEL_RE.search(label):
+        return label
 
+    # the label may still be valid if it has non-ASCII whitespace
+    label = RE_LABEL_SEPARATORS.sub('-', raw_label.strip().lower())
     if not VALID_LABEL_RE.search(label):
         raise ValueError(
             'Label "{}" could not be normalized to contain only a-z, 0-9, '
@@ -298,33 +409,44 @@ class DHCPDHostParser(dict):
             self.t_result = tokenlist
 
         self.p_munch_func = self._p_munch_normal
-        self.t_result.reverse()
+        self.t_pos = 0
 
-        while self.t_result:
+        ntokens = len(self.t_result)
+        while self.t_pos < ntokens:
             self.p_munch_func()
 
+    def _next(self):
+        """return the next token and advance the token position"""
+        token = self.t_result[self.t_pos]
+        self.t_pos += 1
+        return token
+
     def _p_munch_normal(self):
-        """munch tokens and change state if it's "host" """
-        token = self.t_result.pop()
-        if token == 'host':
-            self.p_munch_func = self._p_munch_host
+        """skip tokens up to "host" and change state"""
+        try:
+            self.t_pos = self.t_result.index('host', self.t_pos) + 1
+        except ValueError:
+            self.t_pos = len(self.t_result)
+            return
+        self.p_munch_func = self._p_munch_host
 
     def _p_munch_host(self):
         """parse a host block and add to internal dict"""
         # next token should be the hostname
-        self.cur_hostname = self.t_result.pop()
+        self.cur_hostname = self._next()
         self[self.cur_hostname] = {}
 
-        if self.t_result.pop() != '{':
+        if self._next() != '{':
             raise ValueError(
-                'Expected open curly-brace after host {}'.format(hostname)
+                'Expected open curly-brace after host {}'
+                .format(self.cur_hostname)
             )
 
         self.p_munch_func = self._p_munch_host_entry
 
     def _p_munch_host_entry(self):
         """parse an entry within a host block"""
-        token = self.t_result.pop()
+        token = self._next()
 
         # end of host block
         if token == '}':
@@ -338,16 +460,20 @@ class DHCPDHostParser(dict):
         # if the token is 'hardware' or 'option' then combine with the
         # next token for convienience
         if token == 'hardware' or token == 'option':
-            token = '{} {}'.format(token, self.t_result.pop())
+            token = '{} {}'.format(token, self._next())
 
         key = token
-        val = []
-        token = self.t_result.pop()
-        while token != ';':
-            val.append(token)
-            token = self.t_result.pop()
+        start = self.t_pos
+        try:
+            end = self.t_result.index(';', start)
+        except ValueError:
+            raise ValueError(
+                'Expected semicolon after {} in host {}'
+                .format(key, self.cur_hostname)
+            ) from None
+        self.t_pos = end + 1
 
-        self[self.cur_hostname][key] = ' '.join(val)
+        self[self.cur_hostname][key] = ' '.join(self.t_result[start:end])
 
     def tokenize(self, stream):
         """
@@ -357,114 +483,136 @@ class DHCPDHostParser(dict):
         braces and semicolons separated into their own tokens. The list of
         tokens is returned and set to the object attribute ``t_result``.
 
-        Internally, the tokenizer is set up as a finite state machine. The
-        raw string is munched character by character, with the current token
-        being built in the ``cur_token`` attribute. For each character
-        a function is called to munch the character, and the specific function
-        to be called is determined by the current state: normal, comment,
-        squote, dquote, or postquote. A reference to the function for the
-        current state is held in the attribute ``t_munch_func``.
+        The raw string is scanned with the single regular expression
+        ``DHCPD_TOKEN_RE``, each match of which is whitespace, a comment,
+        a separator, a quoted string, or an unquoted word. A quoted string
+        must be followed by whitespace, a separator, or a comment, and an
+        unquoted word must not run directly into a quote.
 
         :param stream stream: File-like object to read and tokenize:
 
         :returns: List of dhcpd.conf token strings
         :rtype: list(str)
         """
-        self.t_munch_func = self._munch_normal
-        self.t_result = []
-        self.cur_token = []
-
-        raw_string = list(stream.read())
-
-        idx = 1
-        line = 1
-        for char in raw_string:
-            self.t_munch_func(char, idx, line)
-            if char == '\n':
-                line += 1
-                idx = 1
-            else:
-                idx += 1
-        return self.t_result
-
-    def _t_push_token(self, extender=''):
-        """
-        Pushes the current token onto the result list along with
-        the additional string extender added to the token, if the
-        current token is nonempty. Resets the current token to empty.
-        """
-        for char in extender:
-            self.cur_token.append(char)
-        if self.cur_token:
-            self.t_result.append(''.join(self.cur_token))
-        self.cur_token = []
-
-    def _munch_normal(self, char, idx, line):
-        """munch next character in NORMAL state"""
-        if char == '\'':
-            if self.cur_token:
-                raise ValueError(
-                    'Unexpected quote at line {} position {}'
-                    .format(line, idx)
-                )
-            self.t_munch_func = self._munch_squote
-
-        elif char == '"':
-            if self.cur_token:
-                raise ValueError(
-                    'Unexpected quote at line {} position {}'
-                    .format(line, idx)
-                )
-            self.t_munch_func = self._munch_dquote
-
-        elif char in string.whitespace:
-            self._t_push_token()
-
-        elif char in ',;':
-            self._t_push_token()
-            self._t_push_token(char)
-
-        elif char == '#':
-            self._t_push_token()
-            self.t_munch_func = self._munch_comment
+        raw_string = stream.read()
+        self.t_result = result = []
+        append = result.append
+
+        for match in DHCPD_TOKEN_RE.finditer(raw_string):
+            word, sep, quoted = match.group('word', 'sep', 'quoted')
+            if word is not None:
+                append(word.lower())
+                if match.group('badquote'):
+                    line, idx = _line_position(
+                        raw_string, match.start('badquote')
+                    )
+                    raise ValueError(
+                        'Unexpected quote at line {} position {}'
+                        .format(line, idx)
+                    )
+            elif sep is not None:
+                append(sep)
+            elif quoted is not None:
+                if quoted:
+                    append(quoted)
+                char = match.group('badchar')
+                if char:
+                    line, idx = _line_position(
+                        raw_string, match.start('badchar')
+                    )
+                    raise ValueError(
+                        'Unexpected character {} after close quote at '
+                        'line {} pos {}'.format(char, line, idx)
+                    )
+
+        return result
+
+
+def _line_position(text, offset):
+    """
+    Return the line number and the position within the line, both
+    counting from 1, of the character at the given offset of the text.
+    """
+    line = text.count('\n', 0, offset) + 1
+    return line, offset - text.rfind('\n', 0, offset)
 
-        else:
-            self.cur_token.append(char.lower())
-
-    def _munch_comment(self, char, idx, line):
-        """munch next character in COMMENT state"""
-        if char == '\n':
-            self.t_munch_func = self._munch_normal
-
-    def _munch_squote(self, char, idx, line):
-        """munch next character in SQUOTE state"""
-        if char == '\'':
-            self._t_push_token()
-            self.t_munch_func = self._munch_postquote
-        else:
-            self.cur_token.append(char)
 
-    def _munch_dquote(self, char, idx, line):
-        """munch next character in DQUOTE state"""
-        if char == '"':
-            self._t_push_token()
-            self.t_munch_func = self._munch_postquote
-        else:
-            self.cur_token.append(char)
+class ExpiringCache(object):
+    """
+    A minimal mapping holding at most ``maxsize`` entries, each of which
+    expires ``ttl`` seconds after it was set. The least recently used
+    entry is evicted when the cache is full. Access is thread-safe.
 
-    def _munch_postquote(self, char, idx, line):
-        """munch next character in POSTQUOTE state"""
-        allowed = string.whitespace + ',;#'
-        if char not in allowed:
-            raise ValueError(
-                'Unexpected character {} after close quote at line {} pos {}'
-                .format(char, line, idx)
-            )
+    The ``ttl`` may be a number or a callable taking the key and returning
+    the lifetime in seconds for that key, allowing per-key policies.
+    """
+    def __init__(self, maxsize=1024, ttl=60):
+        """
+        :param int maxsize: Maximum number of entries held
+        :param float|callable ttl: Lifetime of entries in seconds, or a
+            function of the key returning the lifetime
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
 
-        elif char in ',;':
-            self._t_push_token(char)
-            self.t_munch_func = self._munch_normal
-        elif char == '#':
-            self.t_munch_func = self._munch_comment
-        else:
-            self.t_munch_func = self._munch_normal
+    def get(self, key, default=None):
+        """
+        Return the unexpired value for key, or default if there is none.
+        """
+        with self._lock:
+            try:
+                expires, value = self._data[key]
+            except KeyError:
+                return default
+            if expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def __getitem__(self, key):
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        ttl = self.ttl(key) if callable(self.ttl) else self.ttl
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._data[key]
+
+    def pop(self, key, default=None):
+        """
+        Remove the entry for key and return its unexpired value, or
+        default if there is none.
+        """
+        with self._lock:
+            try:
+                expires, value = self._data.pop(key)
+            except KeyError:
+                return default
+            if expires <= time.monotonic():
+                return default
+            return value
+
+    def __contains__(self, key):
+        sentinel = object()
+        return self.get(key, sentinel) is not sentinel
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
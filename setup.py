@@ -18,6 +18,11 @@ AUTHOR = 'Eric Appelt'
 
 REQUIRED = ['requests']
 
+# Optional packages for faster handling of large API responses
+EXTRAS = {
+    'fast': ['orjson', 'ijson'],
+}
+
 here = os.path.abspath(os.path.dirname(__file__))
 
 # Import the README and use it as the long-description.
@@ -43,6 +48,7 @@ setup(
         'console_scripts': ['dcim=dcim.cli:main'],
     },
     install_requires=REQUIRED,
+    extras_require=EXTRAS,
     include_package_data=True,
     classifiers=[
         'Development Status :: 1 - Planning',
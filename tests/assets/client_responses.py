@@ -1,6 +1,6 @@
 """
-Provides requests.Response objects for pre-populating a DCIMClient cache
-to use for unit testing.
+Provides a stand-in OpenDCIM server answering the requests of a
+DCIMClient with requests.Response objects to use for unit testing.
 
 Responses are constructed corresponding to an example datacenter room
 'Foo 101' with a single cabinet 'A01' of height 8U and five devices:
@@ -13,8 +13,8 @@ DevID 5: 'node104' - blade server in chassisA
 
 """
 import json
-from copy import deepcopy
 from io import BytesIO
+from urllib.parse import parse_qsl, urlsplit
 
 from requests import Response
 
@@ -138,150 +138,199 @@ DEFAULT_TEMPLATE = {
     'Weight': 85
 }
 
+# Fields differing from DEFAULT_DEVICE for each device in cabinet A01
+DEVICES = [
+    {'DeviceID': 1, 'Label': 'node101', 'Position': 1},
+    {'DeviceID': 2, 'Label': 'node102', 'Position': 2, 'TemplateID': 0},
+    {
+        'DeviceID': 3,
+        'Label': 'chassisA',
+        'Position': 4,
+        'Height': 2,
+        'ChassisSlots': 4,
+        'DeviceType': 'Chassis',
+        'TemplateID': 2
+    },
+    {
+        'DeviceID': 4,
+        'Label': 'node103',
+        'Position': 1,
+        'TemplateID': 3,
+        'ParentDevice': 3
+    },
+    {
+        'DeviceID': 5,
+        'Label': 'node104',
+        'Position': 1,
+        'TemplateID': 3,
+        'ParentDevice': 3
+    }
+]
 
-def populate_cache():
+
+class FakeServer(object):
     """
-    Return a dict of response objects to simulate a set of cached
-    responses from an OpenDCIM server. The cache attribute of a
-    dcim.DCIMClient object can be set to the return value of this
-    function for testing.
+    Stand-in for an OpenDCIM server, answering the requests of a
+    DCIMClient whose session ``send`` method is replaced by the ``send``
+    method of this object. Every request is answered with a new
+    requests.Response object, and its path and querystring arguments are
+    recorded in ``requests``.
+
+    Responses are looked up by path and querystring arguments, and
+    devices are also looked up by one or more repeated labels. Any other
+    request is answered with a 404 error.
     """
-    cache = {}
+    def __init__(self):
+        self.responses = dict(_RESPONSES)
+        self.requests = []
 
-    ringo = deepcopy(DEFAULT_MANUFACTURER)
-    r = construct_json_response(
-        {'error': False, 'errorcode': 200, 'manufacturer': [ringo]},
-        200
-    )
-    cache[('api/v1/manufacturer', frozenset({}.items()))] = r
+    def add(self, path, params, body, status_code=200):
+        """
+        Answer requests for a path and querystring arguments with the
+        given body, encoded as JSON if it is not a str of HTML.
 
-    r730 = deepcopy(DEFAULT_TEMPLATE)
-    r = construct_json_response(
-        {'error': False, 'errorcode': 200, 'template': r730},
-        200
-    )
-    cache[('api/v1/devicetemplate/1', frozenset({}.items()))] = r
+        :param str path: Path of the request, e.g. "api/v1/device"
+        :param params: Querystring arguments as a dict or a list of
+            ``(key, value)`` tuples, or None
+        :param body: Body of the response
+        :param int status_code: Status code of the response
+        """
+        self.responses[_key(path, params)] = (status_code, body)
 
-    dcFoo101 = deepcopy(DEFAULT_DATACENTER)
-    r = construct_json_response(
-        {'error': False, 'errorcode': 200, 'datacenter': [dcFoo101]},
-        200
-    )
-    cache[('api/v1/datacenter/1', frozenset({}.items()))] = r
+    def count(self, path):
+        """
+        Return the number of requests received for a path with any
+        querystring arguments.
+        """
+        return sum(1 for p, params in self.requests if p == path)
 
-    cabinetA01 = deepcopy(DEFAULT_CABINET)
-    r = construct_json_response(
-        {'error': False, 'errorcode': 200, 'cabinet': [cabinetA01]},
-        200
-    )
-    cache[('api/v1/cabinet/1', frozenset({}.items()))] = r
-    cache[('api/v1/cabinet', frozenset({'Location': 'A01'}.items()))] = r
-
-    node101 = deepcopy(DEFAULT_DEVICE)
-    node101['DeviceID'] = 1
-    node101['Height'] = 1
-    node101['Label'] = 'node101'
-    node101['Position'] = 1
-    r = construct_json_response(
-        {'error': False, 'errorcode': 200, 'device': [node101]},
-        200
-    )
-    cache[('api/v1/device', frozenset({'Label': 'node101'}.items()))] = r
-    r = construct_json_response(
-        {'error': False, 'errorcode': 200, 'device': node101},
-        200
-    )
-    cache[('api/v1/device/1', frozenset({}.items()))] = r
-
-    node102 = deepcopy(DEFAULT_DEVICE)
-    node102['DeviceID'] = 2
-    node102['Height'] = 1
-    node102['Label'] = 'node102'
-    node102['Position'] = 2
-    node102['TemplateID'] = 0
-    r = construct_json_response(
-        {'error': False, 'errorcode': 200, 'device': [node102]},
-        200
-    )
-    cache[('api/v1/device', frozenset({'Label': 'node102'}.items()))] = r
-    r = construct_json_response(
-        {'error': False, 'errorcode': 200, 'device': node102},
-        200
-    )
-    cache[('api/v1/device/2', frozenset({}.items()))] = r
-
-    chassisA = deepcopy(DEFAULT_DEVICE)
-    chassisA['DeviceID'] = 3
-    chassisA['Height'] = 2
-    chassisA['Label'] = 'chassisA'
-    chassisA['Position'] = 4
-    chassisA['ChassisSlots'] = 4
-    chassisA['DeviceType'] = 'Chassis'
-    chassisA['TemplateID'] = 2
-    r = construct_json_response(
-        {'error': False, 'errorcode': 200, 'device': [chassisA]},
-        200
-    )
-    cache[('api/v1/device', frozenset({'Label': 'chassisA'}.items()))] = r
-    r = construct_json_response(
-        {'error': False, 'errorcode': 200, 'device': chassisA},
-        200
-    )
-    cache[('api/v1/device/3', frozenset({}.items()))] = r
-
-    node103 = deepcopy(DEFAULT_DEVICE)
-    node103['DeviceID'] = 4
-    node103['Height'] = 1
-    node103['Label'] = 'node103'
-    node103['Position'] = 1
-    node103['TemplateID'] = 3
-    node103['ParentDevice'] = 3
-    r = construct_json_response(
-        {'error': False, 'errorcode': 200, 'device': [node103]},
-        200
+    def send(self, request, **kwargs):
+        url = urlsplit(request.url)
+        path = url.path[url.path.index('api/'):]
+        params = parse_qsl(url.query)
+        self.requests.append((path, params))
+
+        found = self.responses.get(_key(path, params))
+        if found is not None:
+            status_code, body = found
+            if isinstance(body, str):
+                return construct_html_response(body, status_code)
+            return construct_json_response(body, status_code)
+
+        if path == 'api/v1/device' and params and all(
+                k == 'Label' for k, v in params):
+            devices = [_DEVICES[v] for k, v in params if v in _DEVICES]
+            return construct_json_response(
+                {'error': False, 'errorcode': 200, 'device': devices},
+                200
+            )
+
+        return construct_json_response(
+            {'error': True, 'errorcode': 404, 'message': 'Not found'},
+            404
+        )
+
+
+def _key(path, params=None):
+    """
+    Return the key of a response for a path and querystring arguments
+    """
+    if isinstance(params, dict):
+        params = params.items()
+    return (path, tuple(sorted(params or ())))
+
+
+def _build_responses():
+    """
+    Build the response bodies served by ``FakeServer`` and the device
+    information keyed by label.
+    """
+    responses = {}
+
+    ringo = dict(DEFAULT_MANUFACTURER)
+    responses[_key('api/v1/manufacturer')] = (
+        200, {'error': False, 'errorcode': 200, 'manufacturer': [ringo]}
     )
-    cache[('api/v1/device', frozenset({'Label': 'node103'}.items()))] = r
-    r = construct_json_response(
-        {'error': False, 'errorcode': 200, 'device': node103},
-        200
+
+    r730 = dict(DEFAULT_TEMPLATE, CustomValues=[])
+    responses[_key('api/v1/devicetemplate/1')] = (
+        200, {'error': False, 'errorcode': 200, 'template': r730}
     )
-    cache[('api/v1/device/4', frozenset({}.items()))] = r
-
-    node104 = deepcopy(DEFAULT_DEVICE)
-    node104['DeviceID'] = 4
-    node104['Height'] = 1
-    node104['Label'] = 'node104'
-    node104['Position'] = 1
-    node104['TemplateID'] = 3
-    node104['ParentDevice'] = 3
-    r = construct_json_response(
-        {'error': False, 'errorcode': 200, 'device': [node104]},
-        200
+
+    dcFoo101 = dict(DEFAULT_DATACENTER)
+    responses[_key('api/v1/datacenter/1')] = (
+        200, {'error': False, 'errorcode': 200, 'datacenter': [dcFoo101]}
     )
-    cache[('api/v1/device', frozenset({'Label': 'node104'}.items()))] = r
-    r = construct_json_response(
-        {'error': False, 'errorcode': 200, 'device': node104},
-        200
+
+    cabinetA01 = dict(DEFAULT_CABINET)
+    cabinet = (
+        200, {'error': False, 'errorcode': 200, 'cabinet': [cabinetA01]}
     )
-    cache[('api/v1/device/4', frozenset({}.items()))] = r
+    responses[_key('api/v1/cabinet/1')] = cabinet
+    responses[_key('api/v1/cabinet', {'Location': 'A01'})] = cabinet
+
+    devices = {}
+    for overrides in DEVICES:
+        device = dict(DEFAULT_DEVICE, **overrides)
+        devices[device['Label']] = device
+        path = 'api/v1/device/{}'.format(device['DeviceID'])
+        responses[_key(path)] = (
+            200, {'error': False, 'errorcode': 200, 'device': device}
+        )
 
-    cab_devices = [node102, node104, chassisA, node101, node103]
-    r = construct_json_response(
-        {'error': 'False', 'errorcode': 200, 'device': cab_devices},
-        200
+    cab_devices = [
+        devices[label] for label in
+        ('node102', 'node104', 'chassisA', 'node101', 'node103')
+    ]
+    responses[_key('api/v1/device', {'Cabinet': '1'})] = (
+        200, {'error': 'False', 'errorcode': 200, 'device': cab_devices}
     )
-    cache[('api/v1/device', frozenset({'Cabinet': '1'}.items()))] = r
 
-    return cache
+    return responses, devices
 
 
 def construct_json_response(input_dict, status_code):
     """
     Return a requests.Response object with content-type application/json
-    from a given dict and status code
+    from a given dict and status code. The body is set as already read,
+    so the response can be decoded repeatedly and from several threads.
     """
     resp = Response()
     resp.status_code = status_code
     resp.headers['content-type'] = 'application/json'
+    resp.encoding = 'utf-8'
+    resp._content = json.dumps(input_dict).encode('utf-8')
+    resp._content_consumed = True
+    return resp
+
+
+def construct_streamed_response(input_dict, status_code):
+    """
+    Return a requests.Response object with content-type application/json
+    from a given dict and status code whose body has not been read, as
+    returned for a request with ``stream=True``
+    """
+    resp = Response()
+    resp.status_code = status_code
+    resp.headers['content-type'] = 'application/json'
+    resp.encoding = 'utf-8'
     resp.raw = BytesIO(json.dumps(input_dict).encode('utf-8'))
     return resp
+
+
+def construct_html_response(body, status_code):
+    """
+    Return a requests.Response object with content-type text/html from a
+    given body and status code, as sent by a server or proxy rejecting
+    a request
+    """
+    resp = Response()
+    resp.status_code = status_code
+    resp.headers['content-type'] = 'text/html'
+    resp.encoding = 'utf-8'
+    resp._content = body.encode('utf-8')
+    resp._content_consumed = True
+    return resp
+
+
+_RESPONSES, _DEVICES = _build_responses()
@@ -1,24 +1,65 @@
 """
 Tests for the dcim.DCIMClient class that can be performed without
 interacting with an OpenDCIM server. This can be accomplished by
-pre-populating the cache with some device, cabinet, and datacenter
-requests.
+answering the requests of a client with responses for some devices,
+cabinets, and datacenters from a stand-in server.
 """
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 from textwrap import dedent
 
-from dcim.client import DCIMClient
+from dcim import api
+from dcim.async_client import AsyncDCIMClient
+from dcim.client import (
+    DCIMClient,
+    configure,
+    _cache_key,
+    _device_batches,
+    _parse_config_file
+)
+from dcim.errors import DCIMAuthenticationError, DCIMConfigurationError
 
-from tests.assets.client_responses import populate_cache
+from tests.assets.client_responses import (
+    FakeServer,
+    construct_json_response,
+    construct_streamed_response
+)
 
 
-@pytest.fixture
-def client():
+def _served_client(server):
     c = DCIMClient(caching=True)
-    c.cache = populate_cache()
+    c.session.send = server.send
     return c
 
 
+@pytest.fixture(scope='module')
+def client():
+    """
+    Client shared by the tests of a module that only read from it
+    """
+    return _served_client(FakeServer())
+
+
+@pytest.fixture
+def server():
+    """
+    Stand-in server for the client of a single test
+    """
+    return FakeServer()
+
+
+@pytest.fixture
+def fresh_client(server):
+    """
+    Client for tests that modify its cache or other state, or count the
+    requests sent to the server
+    """
+    return _served_client(server)
+
+
 class TestClientLocate:
     """
     Tests for the DCIMClient.locate method
@@ -43,6 +84,340 @@ class TestClientLocate:
         }
         assert client.locate('node103') == expected
 
+    def test_cabinet_and_datacenter_cached(self, fresh_client, server):
+        fresh_client.locate('node101')
+        assert fresh_client.locate('node103')['datacenter'] == 'Foo 101'
+        assert server.count('api/v1/cabinet/1') == 1
+        assert server.count('api/v1/datacenter/1') == 1
+
+    def test_parents_from_device_index(self, fresh_client, server,
+                                       monkeypatch):
+        cabinet_devices = fresh_client.get_cabinet_devices('A01')
+        server.add(
+            'api/v1/device', None,
+            {'error': False, 'errorcode': 200, 'device': cabinet_devices}
+        )
+        node103 = fresh_client.get_device('node103')
+
+        fresh_client.index_parents([node103])
+        assert fresh_client._device_index is None
+
+        monkeypatch.setattr('dcim.client.DEVICE_INDEX_MIN_PARENTS', 1)
+        fresh_client.index_parents([node103])
+        assert fresh_client.locate('node103')['parent_devices'] == ['chassisA']
+        assert server.count('api/v1/device/3') == 0
+
+
+class TestClientGetters:
+    """
+    Tests for the DCIMClient device and cabinet getters
+    """
+    def test_cached_records_copied(self, fresh_client):
+        device = fresh_client.get_device('node101')
+        device['Label'] = 'modified'
+        devices = fresh_client.get_cabinet_devices('A01')
+        devices[0]['Position'] = 99
+        del devices[1:]
+
+        assert fresh_client.get_device('node101')['Label'] == 'node101'
+        assert len(fresh_client.get_cabinet_devices('A01')) == 5
+        assert fresh_client.get_cabinet_devices('A01')[0]['Position'] == 2
+
+
+class TestClientLocateMany:
+    """
+    Tests for the DCIMClient.locate_many method
+    """
+    def _serve_batch(self, server, client, labels, returned):
+        devices = [
+            client.get_device(label) for label in returned
+        ]
+        server.add(
+            'api/v1/device', [('Label', l) for l in labels],
+            {'error': False, 'errorcode': 200, 'device': devices}
+        )
+
+    def test_batch(self, client):
+        labels = ['node101', 'node103']
+        server = FakeServer()
+        batch_client = _served_client(server)
+        result = batch_client.locate_many(labels)
+        assert result == {label: client.locate(label) for label in labels}
+        assert server.requests.count(
+            ('api/v1/device', [('Label', l) for l in labels])
+        ) == 1
+
+    def test_fallback(self, fresh_client, server):
+        labels = ['node101', 'node103']
+        self._serve_batch(server, fresh_client, labels, ['node103'])
+        result = fresh_client.locate_many(labels)
+        assert result['node101'] == fresh_client.locate('node101')
+        assert result['node103'] == fresh_client.locate('node103')
+
+    def test_no_fallback(self, fresh_client, server):
+        labels = ['node101', 'node999']
+        self._serve_batch(server, fresh_client, labels, ['node101'])
+        result = fresh_client.locate_many(labels, fallback=False)
+        assert list(result) == ['node101']
+
+    def test_failed_batch(self, client):
+        labels = ['node101', 'node103']
+        expected = {label: client.locate(label) for label in labels}
+        failures = [
+            (414, '<h1>URI Too Long</h1>'),
+            (200, '<h1>OK</h1>'),
+            (200, {'error': True, 'errorcode': 200})
+        ]
+        for status_code, body in failures:
+            server = FakeServer()
+            server.add(
+                'api/v1/device', [('Label', l) for l in labels],
+                body, status_code
+            )
+            batch_client = _served_client(server)
+            assert batch_client.get_devices(labels) == {}
+            assert batch_client.locate_many(labels) == expected
+
+    def test_batches(self):
+        devices = ['node{:04}'.format(n) for n in range(250)]
+        batches = list(_device_batches(devices, 'Label'))
+        assert [len(b) for b in batches] == [100, 100, 50]
+        assert sum(batches, []) == devices
+
+        devices = ['x' * 1000] * 10
+        batches = list(_device_batches(devices, 'Label'))
+        assert [len(b) for b in batches] == [3, 3, 3, 1]
+
+
+class TestAsyncClient:
+    """
+    Tests for the AsyncDCIMClient wrapper
+    """
+    def test_locate_many(self, fresh_client):
+        async def locate():
+            async with AsyncDCIMClient(client=fresh_client) as aclient:
+                return await aclient.locate_many(['node101', 'node103'])
+
+        loop = asyncio.new_event_loop()
+        try:
+            results = loop.run_until_complete(locate())
+        finally:
+            loop.close()
+        assert results == {
+            'node101': fresh_client.locate('node101'),
+            'node103': fresh_client.locate('node103')
+        }
+
+    def test_close(self, fresh_client):
+        closed = []
+        fresh_client.session.close = lambda: closed.append('given')
+
+        AsyncDCIMClient(client=fresh_client).close()
+        assert closed == []
+
+        aclient = AsyncDCIMClient(caching=True)
+        aclient.client.session.close = lambda: closed.append('owned')
+        executor = aclient.client._get_executor()
+        aclient.close()
+        assert closed == ['owned']
+        with pytest.raises(RuntimeError):
+            executor.submit(int)
+
+
+class TestClientAllDevices:
+    """
+    Tests for the DCIMClient.get_all_devices and iter_all_devices methods
+    """
+    def test_iter_all_devices(self, fresh_client, server):
+        devices = [
+            fresh_client.get_device(l) for l in ('node101', 'node102')
+        ]
+        server.add(
+            'api/v1/device', None,
+            {'error': False, 'errorcode': 200, 'device': devices}
+        )
+        assert (list(fresh_client.iter_all_devices()) ==
+                fresh_client.get_all_devices())
+        assert fresh_client.get_all_devices() == devices
+
+    def test_iter_all_devices_streamed(self, client):
+        pytest.importorskip('ijson')
+        devices = [client.get_device(l) for l in ('node101', 'node102')]
+        requests = []
+
+        def send(request, **kwargs):
+            requests.append((request.url, kwargs.get('stream')))
+            return construct_streamed_response(
+                {'error': False, 'errorcode': 200, 'device': devices},
+                200
+            )
+
+        streaming_client = DCIMClient(caching=False)
+        streaming_client.session.send = send
+        assert list(streaming_client.iter_all_devices()) == devices
+        assert len(requests) == 1
+        assert requests[0][0].endswith('api/v1/device')
+        assert requests[0][1] is True
+
+
+class TestClientAuthentication:
+    """
+    Tests for handling of rejected credentials
+    """
+    def test_auth_failure_remembered(self, fresh_client):
+        calls = []
+
+        def reject(request, **kwargs):
+            calls.append(request.url)
+            return construct_json_response({'error': True}, 401)
+
+        fresh_client.session.send = reject
+        for _ in range(2):
+            with pytest.raises(DCIMAuthenticationError):
+                fresh_client.get_device('node999')
+        assert len(calls) == 1
+
+
+class TestClientVerify:
+    """
+    Tests for disabling certificate verification
+    """
+    def test_verify_disabled_with_ca_bundle(self, monkeypatch):
+        monkeypatch.setattr('dcim.client.client_config', {
+            'baseurl': 'https://opendcim.example.com',
+            'username': 'myuser',
+            'password': 'SECRET',
+            'ssl_verify': False
+        })
+        monkeypatch.setenv('REQUESTS_CA_BUNDLE', '/etc/ssl/bundle.pem')
+        verify = []
+
+        def send(request, **kwargs):
+            verify.append(kwargs['verify'])
+            return construct_json_response(
+                {'error': False, 'errorcode': 200, 'device': []}, 200
+            )
+
+        client = DCIMClient()
+        client.session.send = send
+        client.get_all_devices()
+        client.update_device_by_id(1, {'Label': 'node101'})
+        assert verify == [False, False]
+
+
+
+class TestClientSendGet:
+    """
+    Tests for the prepared GET requests of DCIMClient._send_get
+    """
+    def test_session_changes_applied(self, fresh_client, server):
+        import requests
+
+        sent = []
+
+        def send(request, **kwargs):
+            sent.append(request)
+            return server.send(request, **kwargs)
+
+        fresh_client.session.send = send
+        fresh_client._send_get('api/v1/manufacturer')
+        fresh_client.session.headers['X-Test'] = 'first'
+        fresh_client.session.auth = ('otheruser', 'OTHER')
+        fresh_client.session.params = {'Limit': '5'}
+        fresh_client._send_get('api/v1/device', [('Label', 'node101')])
+
+        first, second = sent
+        assert 'X-Test' not in first.headers
+        assert second.headers['X-Test'] == 'first'
+        assert second.headers['Authorization'] != \
+            first.headers['Authorization']
+        assert server.requests[-1] == (
+            'api/v1/device', [('Label', 'node101')]
+        )
+
+        fresh_client._send_get('api/v1/manufacturer', {'Name': 'Ringo'})
+        assert server.requests[-1] == (
+            'api/v1/manufacturer', [('Limit', '5'), ('Name', 'Ringo')]
+        )
+
+        fresh_client.session = requests.Session()
+        fresh_client.session.send = send
+        fresh_client._send_get('api/v1/manufacturer')
+        assert 'X-Test' not in sent[-1].headers
+        assert 'Authorization' not in sent[-1].headers
+
+
+class TestConvenienceApi:
+    """
+    Tests for the shared client of the convenience API
+    """
+    def test_client_replaced_after_configure(self, monkeypatch):
+        monkeypatch.setattr('dcim.api._default_client', None)
+        monkeypatch.setattr('dcim.api._default_config', None)
+        monkeypatch.setattr('dcim.client.client_config', None)
+        configure('https://old.example.com', 'olduser', 'OLD')
+        first = api._get_client()
+        assert api._get_client() is first
+
+        configure('https://new.example.com', 'newuser', 'NEW')
+        second = api._get_client()
+        assert second is not first
+        assert second._baseurl == 'https://new.example.com/'
+        assert second.session.auth == ('newuser', 'NEW')
+        assert api._get_client() is second
+class TestCacheKey:
+    """
+    Tests for the GET response cache keys
+    """
+    def test_params_order(self):
+        key = _cache_key('api/v1/device', {'Label': 'a', 'Cabinet': '1'})
+        assert key == _cache_key(
+            'api/v1/device', [('Cabinet', '1'), ('Label', 'a')]
+        )
+        assert _cache_key('api/v1/device', {}) == ('api/v1/device',)
+
+    def test_unsupported_params(self):
+        with pytest.raises(TypeError):
+            _cache_key('api/v1/device', 'Label=a')
+
+
+class TestClientMget:
+    """
+    Tests for the DCIMClient._mget method
+    """
+    def test_order(self, client):
+        specs = [
+            ('api/v1/devicetemplate/1', None),
+            ('api/v1/manufacturer', None),
+            ('api/v1/devicetemplate/1', {}),
+        ]
+        template, manufacturer, again = client._mget(specs)
+        assert template.json()['template']['Model'] == 'PowerDrum R730'
+        assert manufacturer.json()['manufacturer'][0]['Name'] == 'Ringo'
+        assert again.json() == template.json()
+
+    def test_empty(self, client):
+        assert client._mget([]) == []
+
+    def test_errors_not_cached(self, fresh_client, server):
+        server.add(
+            'api/v1/department', None,
+            {'error': True, 'errorcode': 503, 'message': 'Unavailable'},
+            503
+        )
+        for i in range(2):
+            resp = fresh_client._get('api/v1/department')
+            assert resp.status_code == 503
+        assert server.count('api/v1/department') == 2
+        assert _cache_key('api/v1/department') not in fresh_client.cache
+
+    def test_identical_sent_once(self, fresh_client, server):
+        fresh_client.caching = False
+        specs = [('api/v1/manufacturer', None)] * 8
+        responses = fresh_client._mget(specs)
+        assert len(responses) == 8
+        assert server.count('api/v1/manufacturer') == 1
+
 
 class TestClientModel:
     """
@@ -64,37 +439,106 @@ class TestClientModel:
         }
         assert client.model('node101') == expected
 
+    def test_manufacturers_invalidated(self, fresh_client, server):
+        fresh_client.model('node101')
+        fresh_client.model('node101')
+        assert server.count('api/v1/manufacturer') == 1
+        fresh_client.invalidate_manufacturers()
+        assert _cache_key('api/v1/manufacturer') not in fresh_client.cache
+        fresh_client.model('node101')
+        assert server.count('api/v1/manufacturer') == 2
+
+
+    def test_concurrent_misses_coalesced(self, fresh_client, server):
+        def slow_send(request, **kwargs):
+            time.sleep(0.05)
+            return server.send(request, **kwargs)
+        fresh_client.session.send = slow_send
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(fresh_client.model, ['node101'] * 8))
+        assert all(r == results[0] for r in results)
+        assert server.count('api/v1/device') == 1
+        assert server.count('api/v1/manufacturer') == 1
+        assert server.count('api/v1/devicetemplate/1') == 1
+
+SHOWRACK_A01 = dedent("""\
+        +----+--------------------------------+
+        |U010|                                |
+        |    |                                |
+        |U009|                                |
+        |    |                                |
+        |U008|                                |
+        |    |                                |
+        |U007|                                |
+        |    |                                |
+        |U006|                                |
+        +----+--------------------------------+
+        |U005||                              ||
+        |    ||                              ||
+        |U004|| chassisA (node104, node103)  ||
+        +----+--------------------------------+
+        |U003|                                |
+        +----+--------------------------------+
+        |U002|| node102                      ||
+        +----+--------------------------------+
+        |U001|| node101                      ||
+        +----+--------------------------------+
+    """).strip()
+
 
 class TestClientShowrack:
     """
     Tests for the client showrack function
     """
     def test_showrack(self, client):
-        expected = """\
-            +----+--------------------------------+
-            |U010|                                |
-            |    |                                |
-            |U009|                                |
-            |    |                                |
-            |U008|                                |
-            |    |                                |
-            |U007|                                |
-            |    |                                |
-            |U006|                                |
-            +----+--------------------------------+
-            |U005||                              ||
-            |    ||                              ||
-            |U004|| chassisA (node104, node103)  ||
-            +----+--------------------------------+
-            |U003|                                |
-            +----+--------------------------------+
-            |U002|| node102                      ||
-            +----+--------------------------------+
-            |U001|| node101                      ||
-            +----+--------------------------------+
-        """
-        expected = dedent(expected).strip()
-
         result = '\n'.join(client.showrack('A01', width=40))
 
-        assert result == expected
+        assert result == SHOWRACK_A01
+
+
+class TestParseConfigFile:
+    """
+    Tests for reading the client configuration file
+    """
+    def test_parse(self, tmp_path):
+        conf = tmp_path / 'dcim.conf'
+        conf.write_text(dedent("""\
+            [dcim]
+            baseurl = https://opendcim.example.com
+            username = myuser
+            password = SECRET
+            ssl_verify = False
+        """))
+        expected = {
+            'baseurl': 'https://opendcim.example.com',
+            'username': 'myuser',
+            'password': 'SECRET',
+            'ssl_verify': False
+        }
+        assert _parse_config_file(str(conf)) == expected
+
+    def test_parse_with_comments(self, tmp_path):
+        conf = tmp_path / 'dcim.conf'
+        conf.write_text(dedent("""\
+            # OpenDCIM server
+            [dcim]
+            baseurl = https://opendcim.example.com
+            username = myuser
+            password = SECRET
+            ssl_verify = True  # optional
+        """))
+        result = _parse_config_file(str(conf))
+        assert result['username'] == 'myuser'
+        assert result['ssl_verify'] is True
+
+    def test_reparse_modified_file(self, tmp_path):
+        conf = tmp_path / 'dcim.conf'
+        conf.write_text('[dcim]\nbaseurl = a\nusername = b\npassword = c\n')
+        assert _parse_config_file(str(conf))['password'] == 'c'
+        conf.write_text('[dcim]\nbaseurl = a\nusername = b\npassword = cd\n')
+        assert _parse_config_file(str(conf))['password'] == 'cd'
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(DCIMConfigurationError):
+            _parse_config_file(str(tmp_path / 'dcim.conf'))
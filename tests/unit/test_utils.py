@@ -10,8 +10,10 @@ from dcim.util import (
     expand_hostlist,
     expand_numlist,
     draw_rack,
+    draw_rack_str,
     normalize_label,
     DHCPDHostParser,
+    ExpiringCache,
 )
 
 class TestHostlistExpand:
@@ -39,96 +41,111 @@ class TestHostlistExpand:
         assert result == expected
 
 
+EMPTY_RACK = dedent("""
+        +----+----------------------------------------+
+        |U008|                                        |
+        |    |                                        |
+        |U007|                                        |
+        |    |                                        |
+        |U006|                                        |
+        |    |                                        |
+        |U005|                                        |
+        |    |                                        |
+        |U004|                                        |
+        |    |                                        |
+        |U003|                                        |
+        |    |                                        |
+        |U002|                                        |
+        |    |                                        |
+        |U001|                                        |
+        +----+----------------------------------------+
+    """).strip()
+
+
+NON_ADJACENT_RACK = dedent("""
+        +----+----------------------------------------+
+        |U008|                                        |
+        +----+----------------------------------------+
+        |U007||                                      ||
+        |    ||                                      ||
+        |U006||                                      ||
+        |    ||                                      ||
+        |U005|| bar                                  ||
+        +----+----------------------------------------+
+        |U004|                                        |
+        |    |                                        |
+        |U003|                                        |
+        +----+----------------------------------------+
+        |U002|| foo                                  ||
+        +----+----------------------------------------+
+        |U001|                                        |
+        +----+----------------------------------------+
+    """).strip()
+
+
+ADJACENT_RACK = dedent("""
+        +----+----------------------------------------+
+        |U008||                                      ||
+        |    ||                                      ||
+        |U007||                                      ||
+        |    ||                                      ||
+        |U006||                                      ||
+        |    ||                                      ||
+        |U005|| baz                                  ||
+        +----+----------------------------------------+
+        |U004||                                      ||
+        |    ||                                      ||
+        |U003||                                      ||
+        |    ||                                      ||
+        |U002|| bar                                  ||
+        +----+----------------------------------------+
+        |U001|| foo                                  ||
+        +----+----------------------------------------+
+    """).strip()
+
 
 class TestDrawRack:
     """
     Tests for the draw_rack function
     """
     def test_empty_rack(self):
-        expected = """
-            +----+----------------------------------------+
-            |U008|                                        |
-            |    |                                        |
-            |U007|                                        |
-            |    |                                        |
-            |U006|                                        |
-            |    |                                        |
-            |U005|                                        |
-            |    |                                        |
-            |U004|                                        |
-            |    |                                        |
-            |U003|                                        |
-            |    |                                        |
-            |U002|                                        |
-            |    |                                        |
-            |U001|                                        |
-            +----+----------------------------------------+
-        """
-        expected = dedent(expected).strip()
-
         result = draw_rack(8, width=40, display=False)
 
-        assert expected == '\n'.join(result)
+        assert '\n'.join(result) == EMPTY_RACK
 
     def test_non_adjacent_devices(self):
-        expected = """
-            +----+----------------------------------------+
-            |U008|                                        |
-            +----+----------------------------------------+
-            |U007||                                      ||
-            |    ||                                      ||
-            |U006||                                      ||
-            |    ||                                      ||
-            |U005|| bar                                  ||
-            +----+----------------------------------------+
-            |U004|                                        |
-            |    |                                        |
-            |U003|                                        |
-            +----+----------------------------------------+
-            |U002|| foo                                  ||
-            +----+----------------------------------------+
-            |U001|                                        |
-            +----+----------------------------------------+
-        """
-        expected = dedent(expected).strip()
-
         result = draw_rack(8, width=40, display=False,
             labels=['foo', 'bar'],
             positions=[2, 5],
             heights=[1, 3]
         )
 
-        assert expected == '\n'.join(result)
+        assert '\n'.join(result) == NON_ADJACENT_RACK
 
     def test_adjacent_devices(self):
-        expected = """
-            +----+----------------------------------------+
-            |U008||                                      ||
-            |    ||                                      ||
-            |U007||                                      ||
-            |    ||                                      ||
-            |U006||                                      ||
-            |    ||                                      ||
-            |U005|| baz                                  ||
-            +----+----------------------------------------+
-            |U004||                                      ||
-            |    ||                                      ||
-            |U003||                                      ||
-            |    ||                                      ||
-            |U002|| bar                                  ||
-            +----+----------------------------------------+
-            |U001|| foo                                  ||
-            +----+----------------------------------------+
-        """
-        expected = dedent(expected).strip()
-
         result = draw_rack(8, width=40, display=False,
             labels=['foo', 'bar', 'baz'],
             positions=[1, 2, 5],
             heights=[1, 3, 4]
         )
 
-        assert expected == '\n'.join(result)
+        assert '\n'.join(result) == ADJACENT_RACK
+
+    def test_repeated_drawing_unchanged(self):
+        result = draw_rack(8, width=40, display=False)
+        result.append('modified')
+        result = draw_rack(8, width=40, display=False)
+
+        assert '\n'.join(result) == EMPTY_RACK
+
+    def test_draw_rack_str(self):
+        result = draw_rack_str(8, width=40,
+            labels=['foo', 'bar', 'baz'],
+            positions=[1, 2, 5],
+            heights=[1, 3, 4]
+        )
+
+        assert result == ADJACENT_RACK
 
 
 class TestNormalizeLabel:
@@ -232,6 +249,21 @@ class TestDHCPDHostParser:
 
         assert parser.tokenize(dhcpd_stream) == expected
 
+    def test_tokenize_last_token_without_newline(self):
+        parser = DHCPDHostParser()
+        tokens = parser.tokenize(StringIO('host "A B" {}'))
+        assert tokens == ['host', 'A B', '{}']
+
+    def test_tokenize_unexpected_quote(self):
+        parser = DHCPDHostParser()
+        with pytest.raises(ValueError, match='line 2 position 4'):
+            parser.tokenize(StringIO('host a;\nabc"d";\n'))
+
+    def test_tokenize_unexpected_char_after_quote(self):
+        parser = DHCPDHostParser()
+        with pytest.raises(ValueError, match='character x .* line 1 pos 5'):
+            parser.tokenize(StringIO('"ab"x;\n'))
+
     def test_parse_two_hosts(self):
 
         tokenlist = [
@@ -262,6 +294,25 @@ class TestDHCPDHostParser:
         assert parser['node099']['hardware ethernet'] == '54:1a:77:2f:70:4d'
         assert parser['node099']['fixed-address'] == '10.0.18.3'
 
+    def test_parse_keeps_tokens(self):
+        tokenlist = ['host', 'node098', '{', 'fixed-address', '10.0.18.2',
+                     ';', '}']
+        parser = DHCPDHostParser()
+        parser.parse_tokens(tokenlist)
+
+        assert parser['node098'] == {'fixed-address': '10.0.18.2'}
+        assert tokenlist[0] == 'host' and len(tokenlist) == 7
+
+    def test_parse_missing_brace(self):
+        parser = DHCPDHostParser()
+        with pytest.raises(ValueError, match='after host node098'):
+            parser.parse_tokens(['host', 'node098', 'fixed-address'])
+
+    def test_parse_missing_semicolon(self):
+        parser = DHCPDHostParser()
+        with pytest.raises(ValueError, match='after fixed-address'):
+            parser.parse_tokens(['host', 'a', '{', 'fixed-address', '10.0.0.1'])
+
     def test_tokenize_and_parse_valid_block2(self):
         dhcpd_raw = """\
             ########################################################
@@ -319,3 +370,35 @@ class TestDHCPDHostParser:
         assert parser['node099']['fixed-address'] == '10.0.18.3'
         assert parser['node099']['option domain-name-servers'] == '192.168.128.10'
         assert parser['node099']['option host-name'] == 'node099.example.com'
+
+
+class TestExpiringCache:
+    """
+    Tests for the util.ExpiringCache class
+    """
+    def test_get_and_set(self):
+        cache = ExpiringCache(maxsize=4, ttl=60)
+        cache['foo'] = 1
+        assert 'foo' in cache
+        assert cache['foo'] == 1
+        assert cache.get('bar') is None
+        with pytest.raises(KeyError):
+            cache['bar']
+
+    def test_expired(self):
+        cache = ExpiringCache(maxsize=4, ttl=lambda key: 0 if key == 'a' else 60)
+        cache['a'] = 1
+        cache['b'] = 2
+        assert 'a' not in cache
+        assert cache['b'] == 2
+
+    def test_evict_least_recently_used(self):
+        cache = ExpiringCache(maxsize=2, ttl=60)
+        cache['a'] = 1
+        cache['b'] = 2
+        cache['a']
+        cache['c'] = 3
+        assert 'b' not in cache
+        assert cache['a'] == 1
+        assert cache['c'] == 3
+        assert len(cache) == 2